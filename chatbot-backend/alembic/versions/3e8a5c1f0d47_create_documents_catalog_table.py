@@ -0,0 +1,61 @@
+"""Create documents catalog table
+
+Revision ID: 3e8a5c1f0d47
+Revises: d71f3a9b6e02
+Create Date: 2025-08-11 16:05:48.902731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e8a5c1f0d47'
+down_revision: Union[str, None] = 'd71f3a9b6e02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('documents',
+    sa.Column('file_hash', sa.String(length=64), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('page_count', sa.Integer(), nullable=False),
+    sa.Column('chunk_count', sa.Integer(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+    sa.Column('uploaded_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('file_hash')
+    )
+    op.create_index('idx_documents_filename_file_hash', 'documents', ['filename', 'file_hash'], unique=False)
+    
+    # Backfill the catalog from chunks that are already in the vectorstore.
+    # The embedding table is created by PGVector, so it may not exist yet.
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('langchain_pg_embedding') IS NOT NULL THEN
+                INSERT INTO documents (file_hash, filename, page_count, chunk_count, uploaded_at)
+                SELECT
+                    cmetadata->>'file_hash',
+                    left(min(coalesce(cmetadata->>'source_filename', 'Unknown')), 255),
+                    coalesce(
+                        max((cmetadata->>'total_pages')::int),
+                        count(DISTINCT cmetadata->>'page')
+                    ),
+                    count(*),
+                    now()
+                FROM langchain_pg_embedding
+                WHERE cmetadata->>'file_hash' IS NOT NULL
+                GROUP BY cmetadata->>'file_hash'
+                ON CONFLICT (file_hash) DO NOTHING;
+            END IF;
+        END
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_documents_filename_file_hash', table_name='documents')
+    op.drop_table('documents')
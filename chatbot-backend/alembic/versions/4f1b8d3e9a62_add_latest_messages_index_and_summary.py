@@ -0,0 +1,35 @@
+"""Add latest messages index and conversation summary
+
+Revision ID: 4f1b8d3e9a62
+Revises: e2f7b9d4c013
+Create Date: 2025-08-21 15:26:34.091573
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1b8d3e9a62'
+down_revision: Union[str, None] = 'e2f7b9d4c013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'idx_messages_conversation_id_created_at',
+        'messages',
+        ['conversation_id', sa.text('created_at DESC')],
+        unique=False
+    )
+    op.add_column('conversations', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('conversations', sa.Column('summarized_until_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('conversations', 'summarized_until_id')
+    op.drop_column('conversations', 'summary')
+    op.drop_index('idx_messages_conversation_id_created_at', table_name='messages')
@@ -0,0 +1,44 @@
+"""Create ingestion jobs table
+
+Revision ID: 5b2d8e41c7a9
+Revises: 0ebbc1fce85e
+Create Date: 2025-08-04 10:12:37.415902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2d8e41c7a9'
+down_revision: Union[str, None] = '0ebbc1fce85e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ingestion_jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('file_hash', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', name='jobstatus'), nullable=False),
+    sa.Column('pages_parsed', sa.Integer(), nullable=False),
+    sa.Column('chunks_total', sa.Integer(), nullable=False),
+    sa.Column('chunks_embedded', sa.Integer(), nullable=False),
+    sa.Column('chunks_stored', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_ingestion_jobs_file_hash', 'ingestion_jobs', ['file_hash'], unique=False)
+    op.create_index('idx_ingestion_jobs_status', 'ingestion_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_ingestion_jobs_status', table_name='ingestion_jobs')
+    op.drop_index('idx_ingestion_jobs_file_hash', table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
+    op.execute("DROP TYPE IF EXISTS jobstatus")
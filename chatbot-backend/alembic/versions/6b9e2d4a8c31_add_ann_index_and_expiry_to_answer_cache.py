@@ -0,0 +1,42 @@
+"""Add ANN and expiry indexes to the answer cache
+
+Revision ID: 6b9e2d4a8c31
+Revises: f3a1c7e5b926
+Create Date: 2025-08-25 08:31:54.219806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.vector_index import EMBEDDING_DIMENSION
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b9e2d4a8c31'
+down_revision: Union[str, None] = 'f3a1c7e5b926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Cached answers can always be regenerated, so entries from a model
+    # with another dimension are dropped rather than converted
+    op.execute(f"DELETE FROM answer_cache WHERE vector_dims(question_embedding) <> {EMBEDDING_DIMENSION}")
+    op.execute(f"""
+        ALTER TABLE answer_cache
+        ALTER COLUMN question_embedding TYPE vector({EMBEDDING_DIMENSION})
+        USING question_embedding::vector({EMBEDDING_DIMENSION})
+    """)
+    op.create_index(
+        'idx_answer_cache_question_embedding', 'answer_cache', ['question_embedding'],
+        unique=False, postgresql_using='hnsw', postgresql_ops={'question_embedding': 'vector_cosine_ops'}
+    )
+    op.create_index('idx_answer_cache_created_at', 'answer_cache', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_answer_cache_created_at', table_name='answer_cache')
+    op.drop_index('idx_answer_cache_question_embedding', table_name='answer_cache')
+    op.execute("ALTER TABLE answer_cache ALTER COLUMN question_embedding TYPE vector")
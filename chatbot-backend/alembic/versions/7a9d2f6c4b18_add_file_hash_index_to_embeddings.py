@@ -0,0 +1,52 @@
+"""Add file hash expression index to vectorstore embeddings
+
+Revision ID: 7a9d2f6c4b18
+Revises: 3e8a5c1f0d47
+Create Date: 2025-08-13 11:22:09.674580
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a9d2f6c4b18'
+down_revision: Union[str, None] = '3e8a5c1f0d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The vectorstore tables are normally created lazily by PGVector. Create
+    # them here with the same schema so migrations can index them.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS langchain_pg_collection (
+            uuid UUID NOT NULL PRIMARY KEY,
+            name VARCHAR NOT NULL UNIQUE,
+            cmetadata JSON
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS langchain_pg_embedding (
+            id VARCHAR NOT NULL PRIMARY KEY,
+            collection_id UUID REFERENCES langchain_pg_collection (uuid) ON DELETE CASCADE,
+            embedding VECTOR,
+            document VARCHAR,
+            cmetadata JSONB
+        )
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_cmetadata_gin
+        ON langchain_pg_embedding USING gin (cmetadata jsonb_path_ops)
+    """)
+    
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_langchain_pg_embedding_file_hash
+        ON langchain_pg_embedding ((cmetadata->>'file_hash'))
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_langchain_pg_embedding_file_hash")
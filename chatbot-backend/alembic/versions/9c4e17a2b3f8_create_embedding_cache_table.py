@@ -0,0 +1,33 @@
+"""Create embedding cache table
+
+Revision ID: 9c4e17a2b3f8
+Revises: 5b2d8e41c7a9
+Create Date: 2025-08-06 14:31:05.118364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e17a2b3f8'
+down_revision: Union[str, None] = '5b2d8e41c7a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('embedding_cache',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('model_name', sa.String(length=255), nullable=False),
+    sa.Column('embedding', Vector(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('content_hash')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('embedding_cache')
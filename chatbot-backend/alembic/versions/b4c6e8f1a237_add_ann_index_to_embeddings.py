@@ -0,0 +1,37 @@
+"""Add ANN index to vectorstore embeddings
+
+Revision ID: b4c6e8f1a237
+Revises: 7a9d2f6c4b18
+Create Date: 2025-08-15 13:40:51.287446
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.vector_index import EMBEDDING_DIMENSION, VECTOR_INDEX_NAME, create_vector_index_sql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4c6e8f1a237'
+down_revision: Union[str, None] = '7a9d2f6c4b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ANN indexes need a fixed dimension on the column
+    op.execute(f"""
+        ALTER TABLE langchain_pg_embedding
+        ALTER COLUMN embedding TYPE vector({EMBEDDING_DIMENSION})
+        USING embedding::vector({EMBEDDING_DIMENSION})
+    """)
+    # Index type and build parameters come from VECTOR_INDEX_TYPE, HNSW_M,
+    # HNSW_EF_CONSTRUCTION and IVFFLAT_LISTS
+    op.execute(create_vector_index_sql())
+
+
+def downgrade() -> None:
+    op.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+    op.execute("ALTER TABLE langchain_pg_embedding ALTER COLUMN embedding TYPE vector")
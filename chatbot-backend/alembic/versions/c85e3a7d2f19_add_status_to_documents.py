@@ -0,0 +1,33 @@
+"""Add ingestion status to documents
+
+Revision ID: c85e3a7d2f19
+Revises: 4f1b8d3e9a62
+Create Date: 2025-08-22 10:12:47.380215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c85e3a7d2f19'
+down_revision: Union[str, None] = '4f1b8d3e9a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    document_status = sa.Enum('INGESTING', 'READY', name='documentstatus')
+    document_status.create(op.get_bind(), checkfirst=True)
+    # Every document catalogued so far was recorded after a completed ingest
+    op.add_column(
+        'documents',
+        sa.Column('status', document_status, nullable=False, server_default='READY')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'status')
+    op.execute("DROP TYPE IF EXISTS documentstatus")
@@ -0,0 +1,39 @@
+"""Create answer cache table
+
+Revision ID: d71f3a9b6e02
+Revises: 9c4e17a2b3f8
+Create Date: 2025-08-08 09:47:22.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd71f3a9b6e02'
+down_revision: Union[str, None] = '9c4e17a2b3f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('answer_cache',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('question', sa.Text(), nullable=False),
+    sa.Column('question_embedding', Vector(), nullable=False),
+    sa.Column('chunk_ids', postgresql.ARRAY(sa.String()), nullable=False),
+    sa.Column('file_hashes', postgresql.ARRAY(sa.String()), nullable=False),
+    sa.Column('answer', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_answer_cache_file_hashes', 'answer_cache', ['file_hashes'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('idx_answer_cache_file_hashes', table_name='answer_cache')
+    op.drop_table('answer_cache')
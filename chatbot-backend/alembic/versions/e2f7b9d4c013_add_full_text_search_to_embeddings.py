@@ -0,0 +1,37 @@
+"""Add full-text search column to vectorstore embeddings
+
+Revision ID: e2f7b9d4c013
+Revises: b4c6e8f1a237
+Create Date: 2025-08-18 10:03:16.842259
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.vector_index import TEXT_SEARCH_CONFIG
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f7b9d4c013'
+down_revision: Union[str, None] = 'b4c6e8f1a237'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        ALTER TABLE langchain_pg_embedding
+        ADD COLUMN IF NOT EXISTS content_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, coalesce(document, ''))) STORED
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_langchain_pg_embedding_content_tsv
+        ON langchain_pg_embedding USING gin (content_tsv)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_langchain_pg_embedding_content_tsv")
+    op.execute("ALTER TABLE langchain_pg_embedding DROP COLUMN IF EXISTS content_tsv")
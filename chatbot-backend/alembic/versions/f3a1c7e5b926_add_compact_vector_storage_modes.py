@@ -0,0 +1,53 @@
+"""Optionally rebuild the ANN index over halfvec or binary-quantized embeddings
+
+The storage mode is chosen explicitly on the command line, never from the
+app's environment, so the migration does the same thing wherever it runs:
+
+    alembic -x vector_storage_mode=halfvec upgrade head
+
+Without the argument the full-precision index is left as it is. The
+compact index is an expression index over the full-precision column, so
+building it converts every existing row and new rows are covered without
+any change to ingestion. halfvec and binary_quantize need pgvector >= 0.7.
+
+Revision ID: f3a1c7e5b926
+Revises: c85e3a7d2f19
+Create Date: 2025-08-24 10:12:37.604318
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.db.vector_index import (
+    VECTOR_INDEX_NAME, VECTOR_STORAGE_MODES, create_vector_index_sql, parse_index_definition
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a1c7e5b926'
+down_revision: Union[str, None] = 'c85e3a7d2f19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    storage_mode = context.get_x_argument(as_dictionary=True).get("vector_storage_mode", "full").lower()
+    if storage_mode not in VECTOR_STORAGE_MODES:
+        raise ValueError(f"Unsupported vector storage mode: {storage_mode}")
+    if storage_mode == "full":
+        return
+    op.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+    op.execute(create_vector_index_sql(storage_mode=storage_mode))
+
+
+def downgrade() -> None:
+    # Earlier revisions can only search a full-precision index
+    definition = op.get_bind().execute(
+        sa.text("SELECT pg_get_indexdef(to_regclass(:index_name))"), {"index_name": VECTOR_INDEX_NAME}
+    ).scalar()
+    if definition is not None and parse_index_definition(definition)[1] == "full":
+        return
+    op.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+    op.execute(create_vector_index_sql())
@@ -0,0 +1,72 @@
+"""Administrative commands.
+
+Usage:
+    python -m app.admin reindex
+    python -m app.admin rebuild-index [--index-type hnsw|ivfflat] [--storage-mode full|halfvec|binary]
+"""
+import argparse
+import asyncio
+import logging
+from sqlalchemy import text
+from app.db.connection import get_ingest_engine
+from app.db.vector_index import (
+    VECTOR_INDEX_NAME, VECTOR_INDEX_TYPE, VECTOR_STORAGE_MODE, VECTOR_STORAGE_MODES, create_vector_index_sql
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+async def run_concurrently(*statements: str) -> None:
+    """Run statements outside a transaction, as CONCURRENTLY index builds require."""
+    engine = get_ingest_engine()
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in statements:
+            logger.info(f"Running: {statement}")
+            await conn.execute(text(statement))
+
+async def reindex() -> None:
+    """Rebuild the ANN index in place without blocking writes."""
+    await run_concurrently(f"REINDEX INDEX CONCURRENTLY {VECTOR_INDEX_NAME}")
+
+async def rebuild_index(index_type: str, storage_mode: str = VECTOR_STORAGE_MODE) -> None:
+    """Build a fresh ANN index with the current settings and swap it in.
+
+    Running apps detect the new index type and storage mode within
+    VECTOR_INDEX_CHECK_SECONDS and shape their searches after it.
+    """
+    new_index_name = f"{VECTOR_INDEX_NAME}_new"
+    await run_concurrently(
+        f"DROP INDEX CONCURRENTLY IF EXISTS {new_index_name}",
+        create_vector_index_sql(new_index_name, index_type, concurrently=True, storage_mode=storage_mode),
+        f"DROP INDEX CONCURRENTLY IF EXISTS {VECTOR_INDEX_NAME}",
+        f"ALTER INDEX {new_index_name} RENAME TO {VECTOR_INDEX_NAME}",
+        "ANALYZE langchain_pg_embedding"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AI Chatbot Backend admin commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("reindex", help="Rebuild the embedding ANN index concurrently")
+    rebuild_parser = subparsers.add_parser(
+        "rebuild-index",
+        help="Recreate the embedding ANN index with the current build parameters"
+    )
+    rebuild_parser.add_argument("--index-type", choices=["hnsw", "ivfflat"], default=VECTOR_INDEX_TYPE)
+    rebuild_parser.add_argument(
+        "--storage-mode", choices=VECTOR_STORAGE_MODES, default=VECTOR_STORAGE_MODE,
+        help="Build the index over full, halfvec or binary-quantized embeddings"
+    )
+    args = parser.parse_args()
+
+    if args.command == "reindex":
+        asyncio.run(reindex())
+    elif args.command == "rebuild-index":
+        asyncio.run(rebuild_index(args.index_type, args.storage_mode))
+
+if __name__ == "__main__":
+    main()
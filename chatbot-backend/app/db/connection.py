@@ -1,45 +1,136 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy import exc
 from functools import lru_cache
+from app.metrics import Counter, Gauge, Histogram
 import logging
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-@lru_cache()
-def get_async_engine() -> AsyncEngine:
-    """Create async engine with connection pooling."""
+CHAT_POOL = "chat"
+INGEST_POOL = "ingest"
+
+# Defaults per pool; each can be overridden with DATABASE_<POOL>_<SETTING>,
+# e.g. DATABASE_CHAT_POOL_SIZE or DATABASE_INGEST_POOL_TIMEOUT
+POOL_DEFAULTS = {
+    CHAT_POOL: {"POOL_SIZE": 5, "MAX_OVERFLOW": 5, "POOL_TIMEOUT": 30},
+    INGEST_POOL: {"POOL_SIZE": 3, "MAX_OVERFLOW": 2, "POOL_TIMEOUT": 30},
+}
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "3600"))
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "false").lower() == "true"
+
+# Labelled by pool name, so the series survive engine.dispose() recreating the pool
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    labelnames=("pool",)
+)
+POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool.", labelnames=("pool",))
+POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection.", labelnames=("pool",))
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def connect(self):
+        pool_name = self._orig_logging_name
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started, pool=pool_name)
+            POOL_TIMEOUTS.inc(pool=pool_name)
+            raise
+        POOL_WAIT_SECONDS.observe(time.perf_counter() - started, pool=pool_name)
+        POOL_CHECKOUTS.inc(pool=pool_name)
+        return connection
+
+def _pool_setting(pool_name: str, setting: str) -> int:
+    default = POOL_DEFAULTS[pool_name][setting]
+    return int(os.getenv(f"DATABASE_{pool_name.upper()}_{setting}", str(default)))
+
+def _create_engine(pool_name: str) -> AsyncEngine:
     # Build database URL from environment variables
     host = os.getenv("DATABASE_HOST", "localhost")
     port = os.getenv("DATABASE_PORT", "5432")
     name = os.getenv("DATABASE_NAME", "rag_db")
     user = os.getenv("DATABASE_USER", "postgres")
     password = os.getenv("DATABASE_PASSWORD", "postgres")
-    
+
     database_url = f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{name}"
-    
+
+    pool_size = _pool_setting(pool_name, "POOL_SIZE")
+    max_overflow = _pool_setting(pool_name, "MAX_OVERFLOW")
+    pool_timeout = _pool_setting(pool_name, "POOL_TIMEOUT")
+
     engine = create_async_engine(
         database_url,
-        pool_size=5,           # Number of connections to maintain
-        max_overflow=5,        # Extra connections under high load  
-        pool_timeout=30,        # Timeout waiting for connection
-        pool_recycle=3600,      # Recycle connections after 1 hour
-        echo=False              # Set True for SQL logging
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=pool_name,
+        pool_size=pool_size,                    # Number of connections to maintain
+        max_overflow=max_overflow,              # Extra connections under high load
+        pool_timeout=pool_timeout,              # Timeout waiting for connection
+        pool_recycle=DATABASE_POOL_RECYCLE,     # Recycle connections after this many seconds
+        pool_pre_ping=DATABASE_POOL_PRE_PING,
+        echo=False                              # Set True for SQL logging
+    )
+
+    logger.info(
+        f"Created async engine '{pool_name}' with pool_size={pool_size}, "
+        f"max_overflow={max_overflow}, pool_timeout={pool_timeout}"
     )
-    
-    logger.info(f"Created async engine with pool_size=5, max_overflow=5")
     return engine
 
-async def get_pool_status() -> dict:
-    """Get connection pool statistics."""
-    engine = get_async_engine()
+@lru_cache()
+def get_async_engine() -> AsyncEngine:
+    """Get the engine for the interactive (chat) path."""
+    return _create_engine(CHAT_POOL)
+
+@lru_cache()
+def get_ingest_engine() -> AsyncEngine:
+    """Get the engine for bulk ingest and delete work.
+
+    Kept separate from the chat pool so long ingestion transactions can
+    never hold the connections that prompt requests need.
+    """
+    return _create_engine(INGEST_POOL)
+
+def _engine_status(engine: AsyncEngine, pool_name: str) -> dict:
     pool = engine.pool
     return {
         "size": pool.size(),
-        "checked_in": pool.checkedin(), 
+        "checked_in": pool.checkedin(),
         "checked_out": pool.checkedout(),
         "overflow": pool.overflow(),
-        "total": pool.size() + pool.overflow()
-    }
\ No newline at end of file
+        "total": pool.size() + pool.overflow(),
+        "max_overflow": _pool_setting(pool_name, "MAX_OVERFLOW"),
+        "timeout": pool.timeout(),
+        "checkouts": int(POOL_CHECKOUTS.value(pool=pool_name)),
+        "timeouts": int(POOL_TIMEOUTS.value(pool=pool_name)),
+        "wait_seconds": POOL_WAIT_SECONDS.snapshot(pool=pool_name)
+    }
+
+async def get_pool_status() -> dict:
+    """Get connection pool statistics for each engine."""
+    return {
+        CHAT_POOL: _engine_status(get_async_engine(), CHAT_POOL),
+        INGEST_POOL: _engine_status(get_ingest_engine(), INGEST_POOL)
+    }
+
+def _checked_out_connections() -> dict:
+    return {
+        (pool_name,): get_engine().pool.checkedout()
+        for pool_name, get_engine in ((CHAT_POOL, get_async_engine), (INGEST_POOL, get_ingest_engine))
+        if get_engine.cache_info().currsize
+    }
+
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    labelnames=("pool",),
+    callback=_checked_out_connections
+)
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, String, Text, DateTime, Integer, ForeignKey, Enum, Index
+from sqlalchemy import Column, String, Text, DateTime, Integer, BigInteger, ForeignKey, Enum, Index
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from pgvector.sqlalchemy import Vector
+from app.db.vector_index import EMBEDDING_DIMENSION
 from datetime import datetime
 import enum
 
@@ -11,6 +14,16 @@ class MessageRole(enum.Enum):
     USER = "user"
     LLM = "llm"
 
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class DocumentStatus(enum.Enum):
+    INGESTING = "ingesting"
+    READY = "ready"
+
 class Conversation(Base):
     __tablename__ = "conversations"
     
@@ -18,6 +31,9 @@ class Conversation(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     title = Column(String(255), nullable=True)  # Optional conversation title
+    # Rolling summary of all messages up to and including summarized_until_id
+    summary = Column(Text, nullable=True)
+    summarized_until_id = Column(Integer, nullable=True)
     
     # Relationship to messages
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
@@ -43,4 +59,74 @@ class Message(Base):
     __table_args__ = (
         Index('idx_messages_conversation_id', 'conversation_id'),
         Index('idx_messages_created_at', 'created_at'),
+        Index('idx_messages_conversation_id_created_at', conversation_id, created_at.desc()),
+    )
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(String, primary_key=True)
+    filename = Column(String(255), nullable=False)
+    file_hash = Column(String(64), nullable=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    pages_parsed = Column(Integer, nullable=False, default=0)
+    chunks_total = Column(Integer, nullable=False, default=0)
+    chunks_embedded = Column(Integer, nullable=False, default=0)
+    chunks_stored = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    # Indexes for faster queries
+    __table_args__ = (
+        Index('idx_ingestion_jobs_file_hash', 'file_hash'),
+        Index('idx_ingestion_jobs_status', 'status'),
+    )
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+    
+    # sha256 of the embedding model name and the chunk text
+    content_hash = Column(String(64), primary_key=True)
+    model_name = Column(String(255), nullable=False)
+    embedding = Column(Vector(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+class AnswerCacheEntry(Base):
+    __tablename__ = "answer_cache"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    question = Column(Text, nullable=False)
+    question_embedding = Column(Vector(EMBEDDING_DIMENSION), nullable=False)
+    chunk_ids = Column(ARRAY(String), nullable=False)
+    file_hashes = Column(ARRAY(String), nullable=False)
+    answer = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Indexes for invalidating entries by document, near-duplicate lookup and expiry
+    __table_args__ = (
+        Index('idx_answer_cache_file_hashes', 'file_hashes', postgresql_using='gin'),
+        Index(
+            'idx_answer_cache_question_embedding', 'question_embedding',
+            postgresql_using='hnsw', postgresql_ops={'question_embedding': 'vector_cosine_ops'}
+        ),
+        Index('idx_answer_cache_created_at', 'created_at'),
+    )
+
+class Document(Base):
+    __tablename__ = "documents"
+    
+    file_hash = Column(String(64), primary_key=True)
+    filename = Column(String(255), nullable=False)
+    page_count = Column(Integer, nullable=False, default=0)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    size_bytes = Column(BigInteger, nullable=True)
+    # The row is inserted as INGESTING to claim the hash before ingestion
+    # starts, which makes the primary key the duplicate check
+    status = Column(Enum(DocumentStatus), nullable=False, default=DocumentStatus.READY, server_default=DocumentStatus.READY.name)
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Index for keyset pagination of the document listing
+    __table_args__ = (
+        Index('idx_documents_filename_file_hash', 'filename', 'file_hash'),
     )
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+from typing import Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "384"))
+
+# Full-text search configuration used by the generated tsvector column
+TEXT_SEARCH_CONFIG = os.getenv("TEXT_SEARCH_CONFIG", "english")
+
+# ANN index configuration
+VECTOR_INDEX_NAME = "idx_langchain_pg_embedding_embedding"
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "hnsw").lower()
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "100"))
+IVFFLAT_PROBES = int(os.getenv("IVFFLAT_PROBES", "10"))
+
+# What the ANN index is built over: full-precision vectors, half-precision
+# (halfvec, half the size) or binary-quantized (bit, 1/32 of the size).
+# Compact modes over-fetch candidates from the index and rescore them
+# exactly against the full-precision column. Requires pgvector >= 0.7.
+# Migrations build the full index unless `-x vector_storage_mode=...` is
+# passed; `python -m app.admin rebuild-index` builds VECTOR_STORAGE_MODE.
+# Searches follow the index that exists.
+VECTOR_STORAGE_MODES = ("full", "halfvec", "binary")
+VECTOR_STORAGE_MODE = os.getenv("VECTOR_STORAGE_MODE", "full").lower()
+INDEX_OPS = {"full": "vector_cosine_ops", "halfvec": "halfvec_cosine_ops", "binary": "bit_hamming_ops"}
+VECTOR_RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
+
+def index_expression(storage_mode: str, column: str = "embedding") -> str:
+    """The expression the ANN index is built over for a storage mode."""
+    if storage_mode == "full":
+        return column
+    if storage_mode == "halfvec":
+        return f"CAST({column} AS halfvec({EMBEDDING_DIMENSION}))"
+    if storage_mode == "binary":
+        return f"CAST(binary_quantize({column}) AS bit({EMBEDDING_DIMENSION}))"
+    raise ValueError(f"Unsupported vector storage mode: {storage_mode}")
+
+def index_distance_sql(storage_mode: str, column: str = "e.embedding", param: str = ":embedding") -> str:
+    """Distance between a row and the query vector parameter that the ANN index can serve."""
+    if storage_mode == "full":
+        return f"{column} <=> CAST({param} AS vector)"
+    if storage_mode == "halfvec":
+        return f"{index_expression(storage_mode, column)} <=> CAST({param} AS halfvec({EMBEDDING_DIMENSION}))"
+    if storage_mode == "binary":
+        return f"{index_expression(storage_mode, column)} <~> binary_quantize(CAST({param} AS vector))"
+    raise ValueError(f"Unsupported vector storage mode: {storage_mode}")
+
+def rescore_candidates(k: int, storage_mode: str = VECTOR_STORAGE_MODE, rescore_factor: int = VECTOR_RESCORE_FACTOR) -> int:
+    """Number of candidates to fetch from the index before exact rescoring."""
+    return k if storage_mode == "full" else k * max(1, rescore_factor)
+
+def create_vector_index_sql(
+    index_name: str = VECTOR_INDEX_NAME,
+    index_type: str = VECTOR_INDEX_TYPE,
+    concurrently: bool = False,
+    storage_mode: str = "full",
+    table: str = "langchain_pg_embedding"
+) -> str:
+    """Build the CREATE INDEX statement for the embedding ANN index."""
+    expression = index_expression(storage_mode)
+    if storage_mode != "full":
+        # Index expressions must be parenthesized
+        expression = f"({expression})"
+
+    if index_type == "hnsw":
+        method = f"hnsw ({expression} {INDEX_OPS[storage_mode]}) WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+    elif index_type == "ivfflat":
+        method = f"ivfflat ({expression} {INDEX_OPS[storage_mode]}) WITH (lists = {IVFFLAT_LISTS})"
+    else:
+        raise ValueError(f"Unsupported vector index type: {index_type}")
+
+    concurrently_clause = "CONCURRENTLY " if concurrently else ""
+    return f"CREATE INDEX {concurrently_clause}IF NOT EXISTS {index_name} ON {table} USING {method}"
+
+def parse_index_definition(definition: str) -> Tuple[str, str]:
+    """Get the index type and storage mode of an ANN index from its pg_get_indexdef() text."""
+    index_type = next((name for name in ("hnsw", "ivfflat") if f" USING {name} " in definition), None)
+    storage_mode = next((mode for mode, ops in INDEX_OPS.items() if f" {ops}" in definition), None)
+    if index_type is None or storage_mode is None:
+        raise ValueError(f"Unsupported vector index: {definition}")
+    return index_type, storage_mode
+
+def search_settings(k: int, ef_search: int = None, probes: int = None, index_type: str = VECTOR_INDEX_TYPE) -> dict:
+    """Get the per-query planner settings for an index type."""
+    if index_type == "hnsw":
+        # HNSW can't return more rows than its candidate list
+        return {"hnsw.ef_search": max(ef_search or HNSW_EF_SEARCH, k)}
+    if index_type == "ivfflat":
+        return {"ivfflat.probes": probes or IVFFLAT_PROBES}
+    return {}
@@ -0,0 +1,150 @@
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.db.connection import get_async_engine
+from app.db.vector_index import (
+    search_settings, index_distance_sql, rescore_candidates, parse_index_definition,
+    TEXT_SEARCH_CONFIG, VECTOR_INDEX_NAME, VECTOR_STORAGE_MODE
+)
+from app.db.vectorstore import get_collection_id
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How long the detected ANN index is trusted before it is looked up again,
+# so an index swapped by `python -m app.admin rebuild-index` is picked up
+VECTOR_INDEX_CHECK_SECONDS = float(os.getenv("VECTOR_INDEX_CHECK_SECONDS", "60"))
+
+_index_config: Optional[Tuple[Optional[str], str]] = None
+_index_checked_at = 0.0
+
+def to_vector_literal(embedding: List[float]) -> str:
+    return "[" + ",".join(str(float(value)) for value in embedding) + "]"
+
+async def get_index_config(conn: AsyncConnection) -> Tuple[Optional[str], str]:
+    """Get the index type and storage mode of the ANN index that actually exists.
+
+    Searches are shaped after the real index rather than the environment, so
+    they can't silently fall back to a sequential scan when the two differ.
+    Without an index the type is None and searches scan the full vectors.
+    """
+    global _index_config, _index_checked_at
+
+    if _index_config is not None and time.monotonic() - _index_checked_at < VECTOR_INDEX_CHECK_SECONDS:
+        return _index_config
+
+    definition = (await conn.execute(
+        text("SELECT pg_get_indexdef(to_regclass(:index_name))"),
+        {"index_name": VECTOR_INDEX_NAME}
+    )).scalar()
+    if definition is None:
+        if _index_config != (None, "full"):
+            logger.warning(f"Vector index {VECTOR_INDEX_NAME} not found, searching without it")
+        # Look again on the next search, the index may be mid-swap
+        _index_config, _index_checked_at = (None, "full"), 0.0
+        return _index_config
+
+    config = parse_index_definition(definition)
+    if config != _index_config:
+        logger.info(f"Searching with {config[0]} index over {config[1]} vectors")
+        if config[1] != VECTOR_STORAGE_MODE:
+            logger.warning(
+                f"Vector index is built over {config[1]} vectors but VECTOR_STORAGE_MODE is "
+                f"{VECTOR_STORAGE_MODE}; run `python -m app.admin rebuild-index` to change it"
+            )
+    _index_config, _index_checked_at = config, time.monotonic()
+    return config
+
+async def vector_search(
+    embedding: List[float],
+    k: int,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Run a cosine nearest-neighbour search over the document chunks.
+
+    The ANN search parameters are applied with SET LOCAL semantics, so they
+    only affect this query's transaction. With a compact index the search
+    over-fetches candidates on the halfvec/binary representation and they
+    are rescored by exact cosine distance on the full vectors.
+    """
+    engine = get_async_engine()
+    collection_id = await get_collection_id()
+
+    async with engine.begin() as conn:
+        index_type, storage_mode = await get_index_config(conn)
+        candidates = rescore_candidates(k, storage_mode)
+        for name, value in search_settings(candidates, ef_search, probes, index_type).items():
+            await conn.execute(
+                text("SELECT set_config(:name, :value, true)"),
+                {"name": name, "value": str(value)}
+            )
+
+        result = await conn.execute(
+            text(f"""
+                SELECT c.id, c.document, c.cmetadata,
+                       c.embedding <=> CAST(:embedding AS vector) AS distance
+                FROM (
+                    SELECT e.id, e.document, e.cmetadata, e.embedding
+                    FROM langchain_pg_embedding e
+                    WHERE e.collection_id = CAST(:collection_id AS uuid)
+                    ORDER BY {index_distance_sql(storage_mode)}
+                    LIMIT :candidates
+                ) c
+                ORDER BY distance
+                LIMIT :k
+            """),
+            {
+                "embedding": to_vector_literal(embedding),
+                "collection_id": collection_id,
+                "candidates": candidates,
+                "k": k
+            }
+        )
+
+        return [
+            {"id": row.id, "content": row.document, "metadata": row.cmetadata or {}, "distance": row.distance}
+            for row in result.all()
+        ]
+
+async def lexical_search(query: str, embedding: List[float], k: int) -> List[Dict[str, Any]]:
+    """Run a full-text search over the document chunks.
+
+    Matches come from the generated `content_tsv` column; the cosine distance
+    to the query embedding is returned as well so lexical-only hits can still
+    be scored against the similarity threshold.
+    """
+    engine = get_async_engine()
+    collection_id = await get_collection_id()
+
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            text("""
+                SELECT e.id, e.document, e.cmetadata,
+                       ts_rank_cd(e.content_tsv, q.query) AS rank,
+                       e.embedding <=> CAST(:embedding AS vector) AS distance
+                FROM langchain_pg_embedding e,
+                     websearch_to_tsquery(CAST(:config AS regconfig), :query) AS q(query)
+                WHERE e.collection_id = CAST(:collection_id AS uuid)
+                  AND e.content_tsv @@ q.query
+                ORDER BY rank DESC
+                LIMIT :k
+            """),
+            {
+                "embedding": to_vector_literal(embedding),
+                "config": TEXT_SEARCH_CONFIG,
+                "query": query,
+                "collection_id": collection_id,
+                "k": k
+            }
+        )
+
+        return [
+            {"id": row.id, "content": row.document, "metadata": row.cmetadata or {}, "distance": row.distance}
+            for row in result.all()
+        ]
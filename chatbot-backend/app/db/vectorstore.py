@@ -1,32 +1,64 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import uuid
 from functools import lru_cache
+from typing import List, Optional
+from sqlalchemy import text
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_postgres import PGVector
-from app.db.connection import get_async_engine
+from app.db.connection import get_async_engine, get_ingest_engine
+from app.db.vector_index import EMBEDDING_DIMENSION
+from app.services.embedding_service import get_embedding_service
 import logging
 
 logger = logging.getLogger(__name__)
 
+# "fake" swaps in deterministic hash-based vectors for offline benchmarks
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "huggingface").lower()
+EMBEDDING_MODEL_NAME = (
+    f"fake-{EMBEDDING_DIMENSION}" if EMBEDDING_PROVIDER == "fake"
+    else os.getenv("EMBEDDING_MODEL_NAME", "BAAI/bge-small-en-v1.5")
+)
+COLLECTION_NAME = "documents"
+
 @lru_cache()
-def get_embeddings() -> HuggingFaceEmbeddings:
+def get_embeddings() -> Embeddings:
     try:
-        embeddings = HuggingFaceEmbeddings(
-            model_name="BAAI/bge-small-en-v1.5"
-        )
-        logger.info("Initialized embeddings model: BAAI/bge-small-en-v1.5")
+        if EMBEDDING_PROVIDER == "fake":
+            embeddings = DeterministicFakeEmbedding(size=EMBEDDING_DIMENSION)
+        else:
+            embeddings = HuggingFaceEmbeddings(
+                model_name=EMBEDDING_MODEL_NAME
+            )
+        logger.info(f"Initialized embeddings model: {EMBEDDING_MODEL_NAME}")
         return embeddings
     except Exception as e:
         logger.error(f"Failed to initialize embeddings model: {str(e)}")
         raise Exception(f"Embeddings initialization failed: {str(e)}")
 
-async def get_vectorstore() -> PGVector:
-    """Get vectorstore with connection from pool."""
-    engine = get_async_engine()
-    embeddings = get_embeddings()
+_vectorstore: Optional[PGVector] = None
+_collection_id: Optional[str] = None
+_init_lock = asyncio.Lock()
+
+def create_vectorstore() -> PGVector:
+    """Create a vectorstore instance on the ingest connection pool.
+
+    Searches run through app.db.vector_search on the chat pool, so the
+    vectorstore itself only writes and deletes chunks.
+    """
+    engine = get_ingest_engine()
+    # Route all embedding calls through the batching service
+    embeddings = get_embedding_service()
 
     try:
         vectorstore = PGVector(
             embeddings=embeddings,
-            collection_name="documents", 
+            collection_name=COLLECTION_NAME, 
+            embedding_length=EMBEDDING_DIMENSION,
             connection=engine,
             use_jsonb=True,
             async_mode=True,
@@ -38,3 +70,88 @@ async def get_vectorstore() -> PGVector:
     except Exception as e:
         logger.error(f"Failed to create vectorstore: {str(e)}")
         raise Exception(f"Vectorstore creation failed: {str(e)}")
+
+async def init_vectorstore() -> PGVector:
+    """Create the application-wide vectorstore and warm it up.
+
+    Opens the first pooled connection, resolves the collection and loads the
+    embedding model so that no request pays for it. Raises if any step fails.
+    """
+    global _vectorstore, _collection_id
+
+    vectorstore = create_vectorstore()
+    
+    for engine in (get_async_engine(), get_ingest_engine()):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    
+    # Creates the tables and collection if needed, then caches its id
+    await vectorstore.acreate_collection()
+    async with vectorstore.session_maker() as session:
+        collection = await vectorstore.aget_collection(session)
+    
+    await vectorstore.embeddings.aembed_query("warm up")
+    
+    _vectorstore = vectorstore
+    _collection_id = str(collection.uuid)
+    logger.info(f"Initialized vectorstore for collection '{COLLECTION_NAME}' ({_collection_id})")
+    return vectorstore
+
+async def get_vectorstore() -> PGVector:
+    """Get the application-wide vectorstore, initializing it on first use."""
+    if _vectorstore is None:
+        async with _init_lock:
+            if _vectorstore is None:
+                return await init_vectorstore()
+    return _vectorstore
+
+async def get_collection_id() -> str:
+    """Get the id of the documents collection."""
+    if _collection_id is None:
+        await get_vectorstore()
+    return _collection_id
+
+async def copy_embeddings(
+    texts: List[str],
+    embeddings: List[List[float]],
+    metadatas: List[dict]
+) -> List[str]:
+    """Insert chunks with COPY and return their ids.
+
+    Equivalent to PGVector.aadd_embeddings for new chunks, but streams one
+    CSV payload over the ingest pool instead of binding every value and
+    skips the per-call collection lookup.
+
+    Like PGVector, each call commits its batch on its own, so no connection
+    or transaction is held while the next batch is embedded. Callers own
+    the cleanup: the embedder deletes the batches of a document that is not
+    recorded, and claim_document removes any that survive a crash.
+    """
+    collection_id = await get_collection_id()
+    ids = [str(uuid.uuid4()) for _ in texts]
+
+    buffer = io.StringIO()
+    # Quote everything so empty strings aren't read back as NULL
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    for chunk_id, text, embedding, metadata in zip(ids, texts, embeddings, metadatas):
+        writer.writerow([
+            chunk_id,
+            collection_id,
+            "[" + ",".join(str(float(value)) for value in embedding) + "]",
+            text,
+            json.dumps(metadata)
+        ])
+
+    async with get_ingest_engine().connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        # SQLAlchemy's transaction doesn't cover statements sent through the
+        # driver, so commit the batch explicitly instead of relying on autocommit
+        async with driver_connection.transaction():
+            await driver_connection.copy_to_table(
+                "langchain_pg_embedding",
+                source=io.BytesIO(buffer.getvalue().encode("utf-8")),
+                columns=["id", "collection_id", "embedding", "document", "cmetadata"],
+                format="csv"
+            )
+    return ids
@@ -0,0 +1,210 @@
+"""Bulk ingestion of PDFs from a directory or a manifest file.
+
+Usage:
+    python -m app.ingest <directory|manifest> [--workers N] [--batch-size N] [--checkpoint PATH]
+
+A directory is searched recursively for *.pdf files. A manifest is a text
+file with one PDF path per line (relative paths are resolved against the
+manifest's directory; blank lines and lines starting with # are ignored).
+
+Files whose hash is already in the catalog are skipped. Every finished or
+skipped file is appended to a JSONL checkpoint, so re-running the same
+command after an interruption resumes where it stopped. Failed files, and
+files another process was still ingesting, are retried on the next run.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from langchain_postgres import PGVector
+from app.db.vectorstore import init_vectorstore
+from app.services.catalog import get_existing_file_hashes
+from app.services.embedder import (
+    process_and_store_pdf_path, generate_file_hash_from_path, shutdown_ingest_executor,
+    DocumentExistsError, INGEST_MAX_CONCURRENCY, INGEST_MAX_QUEUE_DEPTH
+)
+from app.services.embedding_service import get_embedding_service
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1024
+
+def discover_pdfs(source: str) -> List[Path]:
+    """List the PDFs in a directory, or the ones named in a manifest file."""
+    source_path = Path(source)
+    if source_path.is_dir():
+        return sorted(path for path in source_path.rglob("*") if path.suffix.lower() == ".pdf")
+    if source_path.suffix.lower() == ".pdf":
+        return [source_path]
+
+    paths = []
+    with open(source_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = Path(line)
+            paths.append(path if path.is_absolute() else source_path.parent / path)
+    return paths
+
+def load_checkpoint(path: str) -> Dict[str, dict]:
+    """Read the latest checkpoint entry per file path."""
+    entries: Dict[str, dict] = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[entry["path"]] = entry
+    return entries
+
+class BulkIngest:
+    """Shared state of one bulk ingestion run."""
+
+    def __init__(self, vectorstore: PGVector, checkpoint_path: str, batch_size: int):
+        self.vectorstore = vectorstore
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.seen_hashes = set()
+        self.counts = {"ingested": 0, "skipped": 0, "in_progress": 0, "failed": 0, "pages": 0, "chunks": 0}
+        self._checkpoint = open(checkpoint_path, "a")
+
+    def record(self, path: Path, status: str, **details) -> None:
+        self._checkpoint.write(json.dumps({"path": str(path), "status": status, **details}) + "\n")
+        self._checkpoint.flush()
+
+    def close(self) -> None:
+        self._checkpoint.close()
+
+    async def ingest_file(self, path: Path) -> None:
+        file_hash = await asyncio.to_thread(generate_file_hash_from_path, str(path))
+        if file_hash in self.seen_hashes or await get_existing_file_hashes([file_hash]):
+            self.counts["skipped"] += 1
+            self.record(path, "skipped", file_hash=file_hash)
+            return
+        self.seen_hashes.add(file_hash)
+
+        pages = 0
+
+        async def track_pages(pages_parsed: Optional[int] = None, **counters) -> None:
+            nonlocal pages
+            if pages_parsed is not None:
+                pages = pages_parsed
+
+        try:
+            chunk_count = await process_and_store_pdf_path(
+                str(path), path.name, file_hash, path.stat().st_size, self.vectorstore,
+                progress=track_pages, store_batch_size=self.batch_size
+            )
+        except DocumentExistsError:
+            # Another process holds the claim; it may still fail, so check again next run
+            self.seen_hashes.discard(file_hash)
+            self.counts["in_progress"] += 1
+            self.record(path, "in_progress", file_hash=file_hash)
+            return
+        except Exception as e:
+            self.seen_hashes.discard(file_hash)
+            self.counts["failed"] += 1
+            self.record(path, "failed", file_hash=file_hash, error=str(e))
+            logger.error(f"Failed to ingest {path}: {str(e)}")
+            return
+
+        self.counts["ingested"] += 1
+        self.counts["pages"] += pages
+        self.counts["chunks"] += chunk_count
+        self.record(path, "done", file_hash=file_hash, pages=pages, chunks=chunk_count)
+        logger.info(f"Ingested {path} ({pages} pages, {chunk_count} chunks)")
+
+async def run(source: str, workers: int, batch_size: int, checkpoint_path: str) -> dict:
+    # Beyond this many files in flight the ingest pipeline rejects new ones
+    workers = max(1, min(workers, INGEST_MAX_CONCURRENCY + INGEST_MAX_QUEUE_DEPTH))
+    paths = discover_pdfs(source)
+    finished = {
+        entry_path for entry_path, entry in load_checkpoint(checkpoint_path).items()
+        if entry["status"] in ("done", "skipped")
+    }
+    pending = [path for path in paths if str(path) not in finished]
+    logger.info(
+        f"Found {len(paths)} PDFs, {len(paths) - len(pending)} already in checkpoint, "
+        f"{len(pending)} to process with {workers} workers"
+    )
+
+    bulk = BulkIngest(await init_vectorstore(), checkpoint_path, batch_size)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for path in pending:
+        queue.put_nowait(path)
+
+    async def worker() -> None:
+        while not queue.empty():
+            path = queue.get_nowait()
+            try:
+                await bulk.ingest_file(path)
+            except Exception as e:
+                bulk.counts["failed"] += 1
+                logger.error(f"Failed to ingest {path}: {str(e)}")
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        bulk.close()
+    elapsed = time.perf_counter() - started
+
+    return {
+        **bulk.counts,
+        "elapsed_seconds": round(elapsed, 1),
+        "pages_per_second": round(bulk.counts["pages"] / elapsed, 2) if elapsed else 0,
+        "chunks_per_second": round(bulk.counts["chunks"] / elapsed, 2) if elapsed else 0
+    }
+
+async def run_and_shutdown(source: str, workers: int, batch_size: int, checkpoint_path: str) -> dict:
+    try:
+        return await run(source, workers, batch_size, checkpoint_path)
+    finally:
+        shutdown_ingest_executor()
+        if get_embedding_service.cache_info().currsize:
+            get_embedding_service().shutdown()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk ingest PDFs from a directory or manifest")
+    parser.add_argument("source", help="Directory to search for PDFs, or a manifest file of PDF paths")
+    parser.add_argument(
+        "--workers", type=int, default=INGEST_MAX_CONCURRENCY,
+        help="Files ingested concurrently (parsing always runs in the ingest process pool)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help="Chunks embedded and inserted per batch"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="JSONL checkpoint file (default: <source>.ingest-checkpoint.jsonl)"
+    )
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{os.path.abspath(args.source).rstrip(os.sep)}.ingest-checkpoint.jsonl"
+    summary = asyncio.run(run_and_shutdown(args.source, args.workers, args.batch_size, checkpoint_path))
+
+    print(
+        f"Ingested {summary['ingested']} files, skipped {summary['skipped']}, "
+        f"{summary['in_progress']} being ingested elsewhere, failed {summary['failed']} "
+        f"in {summary['elapsed_seconds']}s"
+    )
+    print(
+        f"{summary['pages']} pages ({summary['pages_per_second']} pages/s), "
+        f"{summary['chunks']} chunks ({summary['chunks_per_second']} chunks/s)"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,24 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.documents import documents_router
 from app.routes.prompt import prompt_router
 from app.db.connection import get_pool_status
+from app.db.vectorstore import init_vectorstore
+from app.metrics import render_metrics, HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+from app.services.embedder import get_ingest_status, shutdown_ingest_executor
+from app.services.embedding_service import get_embedding_metrics, get_embedding_service
+from app.services.embedding_cache import get_embedding_cache_stats
+from app.services.retrieval_cache import get_retrieval_cache_stats
+from app.services.answer_cache import get_answer_cache_stats, start_answer_cache_pruning, stop_answer_cache_pruning
+from app.services.reranker import get_rerank_cache_stats
+from app.services.jobs import start_job_workers, stop_job_workers, get_job_queue_status
+from app.services.llm_scheduler import get_llm_scheduler
+from app.services.ollama_client import warm_up_models, start_keep_warm, stop_keep_warm, OLLAMA_WARMUP_ENABLED
 import logging
 import os
+import time
 
 # Configure logging
 logging.basicConfig(
@@ -12,10 +26,71 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Starting AI Chatbot Backend...")
+    
+    # Fail fast: don't serve requests without a working vectorstore
+    try:
+        app.state.vectorstore = await init_vectorstore()
+        logger.info("Database connection successful")
+    except Exception as e:
+        logger.error(f"Database connection failed: {str(e)}")
+        raise
+    
+    # Load the chat model and run the embedding model once, so no request pays for it
+    if OLLAMA_WARMUP_ENABLED:
+        await warm_up_models()
+    start_keep_warm()
+    start_answer_cache_pruning()
+    
+    await start_job_workers()
+    
+    yield
+    
+    await stop_job_workers()
+    await stop_answer_cache_pruning()
+    await stop_keep_warm()
+    shutdown_ingest_executor()
+    if get_embedding_service.cache_info().currsize:
+        get_embedding_service().shutdown()
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and durations per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Label by route template to keep cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUESTS.inc(method=scope["method"], path=path, status=status_code)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope["method"], path=path)
+
 app = FastAPI(
     title="AI Chatbot Backend",
     description="FastAPI backend for uploading PDFs and storing embeddings",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -28,28 +103,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Include routes
 app.include_router(documents_router, prefix="/api")
 app.include_router(prompt_router, prefix="/api")
 
-@app.on_event("startup")
-async def startup_event():
-    logger = logging.getLogger(__name__)
-    logger.info("Starting AI Chatbot Backend...")
-    
-    try:
-        from app.db.vectorstore import get_vectorstore
-        await get_vectorstore()
-        logger.info("Database connection successful")
-    except Exception as e:
-        logger.error(f"Database connection failed: {str(e)}")
-        logger.warning("App started but database is not accessible")
-
 @app.get("/health")
 async def health_check():
     """Health check endpoint with connection pool status."""
     pool_status = await get_pool_status()
     return {
         "status": "healthy",
-        "pool": pool_status
+        "pool": pool_status,
+        "ingest": get_ingest_status(),
+        "jobs": get_job_queue_status(),
+        "llm": get_llm_scheduler().status(),
+        "embeddings": get_embedding_metrics(),
+        "embedding_cache": get_embedding_cache_stats(),
+        "retrieval_cache": get_retrieval_cache_stats(),
+        "answer_cache": get_answer_cache_stats(),
+        "rerank_cache": get_rerank_cache_stats()
     }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics in the text exposition format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
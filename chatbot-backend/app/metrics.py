@@ -0,0 +1,190 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; fine-grained at the low end where pool waits and queries usually land
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# LLM generation and whole-document ingestion take seconds to minutes
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_registry: List["_Metric"] = []
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), register: bool = True):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if register:
+            _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+            *self._samples()
+        ]
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+class Gauge(_Metric):
+    """Point-in-time values read from a callback when metrics are rendered.
+
+    The callback returns a mapping of label-value tuples to the current value.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None, register: bool = True):
+        super().__init__(name, documentation, labelnames, register)
+        self.callback = callback
+
+    def _samples(self) -> List[str]:
+        values = self.callback() if self.callback else {}
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+class Histogram(_Metric):
+    """Cumulative histogram of observed durations, optionally labelled."""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, register: bool = True):
+        super().__init__(name, documentation, labelnames, register)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts with a trailing +Inf slot, [sum, count])
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall-clock duration of the wrapped block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels) -> dict:
+        """Get cumulative bucket counts keyed by upper bound, plus sum and count."""
+        key = self._key(labels)
+        with self._lock:
+            counts, totals = self._series.get(key, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            counts, (total, count) = list(counts), list(totals)
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {"buckets": buckets, "sum": round(total, 6), "count": int(count)}
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(counts), list(totals)) for key, (counts, totals) in self._series.items())
+        lines = []
+        for key, counts, (total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {int(count)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {int(count)}")
+        return lines
+
+def render_metrics() -> str:
+    """Render all registered metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route and status code.",
+    labelnames=("method", "path", "status")
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request duration, including streamed response bodies.",
+    labelnames=("method", "path"),
+    buckets=SLOW_BUCKETS
+)
+
+# RAG pipeline metrics shared across modules
+PROMPT_STAGE_SECONDS = Histogram(
+    "rag_prompt_stage_seconds",
+    "Time spent in each stage of answering a prompt.",
+    labelnames=("stage",),
+    buckets=SLOW_BUCKETS
+)
+INGEST_STAGE_SECONDS = Histogram(
+    "rag_ingest_stage_seconds",
+    "Time spent in each stage of ingesting a PDF.",
+    labelnames=("stage",),
+    buckets=SLOW_BUCKETS
+)
+CHUNKS_RETRIEVED = Counter(
+    "rag_chunks_retrieved_total",
+    "Chunks returned by retrieval, before and after context assembly.",
+    labelnames=("phase",)
+)
+PROMPT_CHARACTERS = Counter("rag_prompt_characters_total", "Characters sent to the LLM in prompts.")
+PROMPT_TOKENS = Counter("rag_prompt_tokens_estimated_total", "Estimated tokens sent to the LLM in prompts.")
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    labelnames=("cache", "result")
+)
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from pydantic import BaseModel, Field
 from langchain_postgres import PGVector
-from app.services.embedder import process_and_store_pdf_file, generate_file_hash, check_document_exists
+from app.services.embedder import (
+    process_and_store_pdf_path, spool_upload, remove_temp_file,
+    IngestQueueFullError, DocumentExistsError, PdfParseError
+)
+from app.services.retrieval_cache import bump_corpus_version
+from app.services.catalog import list_documents_page, delete_documents, document_exists
+from app.services.jobs import create_job, enqueue_job, get_job, get_active_job_for_hash, update_job
 from app.db.vectorstore import get_vectorstore
+from app.db.models import JobStatus
 from datetime import datetime, timezone
-from typing import List
-from sqlalchemy import text
+from typing import List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,31 +25,37 @@ class UploadResponse(BaseModel):
 
 documents_router = APIRouter()
 
-@documents_router.post("/document", response_model=UploadResponse)
-async def upload_pdf(file: UploadFile = File(...)):
-    """Upload a PDF document and store its embeddings in the vector database."""
+async def spool_pdf_upload(file: UploadFile) -> Tuple[str, str, int]:
+    """Validate an uploaded PDF and spool it to a temporary file.
+
+    Returns the temporary file path, file hash and size in bytes. The
+    caller is responsible for removing the file.
+    """
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-    contents = await file.read()
+    tmp_path, file_hash, size_bytes = await spool_upload(file)
     
-    if len(contents) == 0:
+    if size_bytes == 0:
+        remove_temp_file(tmp_path)
         raise HTTPException(status_code=400, detail="Uploaded file is empty")
     
-    # Get vectorstore with connection from pool
-    vectorstore = await get_vectorstore()
-    
-    # Check for duplicates
-    file_hash = generate_file_hash(contents)
-    if await check_document_exists(file_hash, vectorstore):
-        raise HTTPException(
-            status_code=409, 
-            detail=f"Document '{file.filename}' has already been uploaded"
-        )
+    return tmp_path, file_hash, size_bytes
 
+@documents_router.post("/document", response_model=UploadResponse)
+async def upload_pdf(
+    file: UploadFile = File(...),
+    vectorstore: PGVector = Depends(get_vectorstore)
+):
+    """Upload a PDF document and store its embeddings in the vector database."""
+    tmp_path, file_hash, size_bytes = await spool_pdf_upload(file)
+    
     try:
-        # Process the PDF and get the chunk count
-        chunk_count = await process_and_store_pdf_file(contents, file.filename, vectorstore)
+        # Process the PDF and get the chunk count; the hash is claimed
+        # atomically first, so duplicates are rejected before any work
+        chunk_count = await process_and_store_pdf_path(
+            tmp_path, file.filename, file_hash, size_bytes, vectorstore
+        )
         
         if chunk_count == 0:
             logger.warning(f"No content extracted from PDF: {file.filename}")
@@ -63,65 +75,137 @@ async def upload_pdf(file: UploadFile = File(...)):
             message=f"Successfully processed {chunk_count} chunks"
         )
         
+    except DocumentExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except PdfParseError as e:
+        logger.warning(f"Rejected unreadable PDF {file.filename}: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except IngestQueueFullError as e:
+        logger.warning(f"Rejected upload of {file.filename}: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
     except Exception as e:
         logger.error(f"Error processing PDF {file.filename}: {str(e)}")
         raise HTTPException(
             status_code=500, 
             detail=f"Failed to process PDF: {str(e)}"
         )
+    finally:
+        remove_temp_file(tmp_path)
+
+class JobResponse(BaseModel):
+    job_id: str
+    filename: str
+    file_hash: str
+    status: str
+
+class JobStatusResponse(JobResponse):
+    pages_parsed: int
+    chunks_total: int
+    chunks_embedded: int
+    chunks_stored: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+@documents_router.post("/document/jobs", response_model=JobResponse, status_code=202)
+async def upload_pdf_job(file: UploadFile = File(...)):
+    """Upload a PDF document and ingest it in the background.
+
+    Returns immediately with a job ID that can be polled through
+    `GET /api/document/jobs/{job_id}`.
+    """
+    tmp_path, file_hash, size_bytes = await spool_pdf_upload(file)
+    
+    # The spooled file is handed over to the job, which removes it when done
+    try:
+        # A retry of an upload that is still being processed reuses the running job
+        active_job = await get_active_job_for_hash(file_hash)
+        if active_job:
+            remove_temp_file(tmp_path)
+            return JobResponse(**{key: active_job[key] for key in JobResponse.model_fields})
+        
+        # Indexed pre-check for a fast 409; the job itself claims the hash
+        # atomically, so a concurrent duplicate still fails there
+        if await document_exists(file_hash):
+            raise HTTPException(
+                status_code=409, 
+                detail=f"Document '{file.filename}' has already been uploaded"
+            )
+        
+        job_id = await create_job(file.filename, file_hash)
+    except Exception:
+        remove_temp_file(tmp_path)
+        raise
+    
+    try:
+        await enqueue_job(job_id, tmp_path, file.filename, file_hash, size_bytes)
+    except IngestQueueFullError as e:
+        remove_temp_file(tmp_path)
+        await update_job(job_id, status=JobStatus.FAILED, error=str(e))
+        logger.warning(f"Rejected upload of {file.filename}: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
+    
+    return JobResponse(
+        job_id=job_id,
+        filename=file.filename,
+        file_hash=file_hash,
+        status=JobStatus.QUEUED.value
+    )
+
+@documents_router.get("/document/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    """Get the status and progress of a background ingestion job."""
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return JobStatusResponse(**job)
+
+# Page size when a cursor is given without a limit
+DEFAULT_DOCUMENTS_PAGE_SIZE = 100
 
 class DocumentInfo(BaseModel):
     filename: str
     file_hash: str
+    page_count: int
+    chunk_count: int
+    size_bytes: Optional[int] = None
+    uploaded_at: datetime
 
 class DocumentListResponse(BaseModel):
     documents: List[DocumentInfo]
+    next_cursor: Optional[str] = None
 
 @documents_router.get("/documents", response_model=DocumentListResponse)
-async def list_documents():
-    """List all uploaded documents with their metadata."""
+async def list_documents(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """List uploaded documents ordered by filename.
+
+    Without `limit` or `cursor` all documents are returned. With them the
+    list is paginated; pass the returned `next_cursor` back as `cursor` to
+    get the next page.
+    """
+    if cursor and limit is None:
+        limit = DEFAULT_DOCUMENTS_PAGE_SIZE
     try:
-        from app.db.connection import get_async_engine
-        
-        engine = get_async_engine()
-        
-        async with engine.begin() as conn:
-            # Get unique file hashes first
-            hash_query = text("""
-                SELECT DISTINCT cmetadata->>'file_hash' as file_hash
-                FROM langchain_pg_embedding 
-                WHERE cmetadata->>'file_hash' IS NOT NULL
-            """)
-            
-            result = await conn.execute(hash_query)
-            file_hashes = [row[0] for row in result.fetchall()]
-        
-        documents = []
-        vectorstore = await get_vectorstore()
-        
-        # For each unique file hash, get one document to extract metadata
-        for file_hash in file_hashes:
-            try:
-                # Get one document for metadata
-                sample_docs = await vectorstore.asimilarity_search("", k=1, filter={"file_hash": file_hash})
-                if sample_docs:
-                    filename = sample_docs[0].metadata.get("source_filename", "Unknown")
-                    
-                    documents.append(DocumentInfo(
-                        filename=filename,
-                        file_hash=file_hash
-                    ))
-            except Exception as e:
-                logger.warning(f"Error processing file hash {file_hash}: {str(e)}")
-                continue
-        
-        # Sort by filename for consistent ordering
-        documents.sort(key=lambda x: x.filename)
+        documents, next_cursor = await list_documents_page(limit, cursor)
         
         return DocumentListResponse(
-            documents=documents
+            documents=[DocumentInfo(**document) for document in documents],
+            next_cursor=next_cursor
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing documents: {str(e)}")
         raise HTTPException(
@@ -137,41 +221,27 @@ class DeleteResponse(BaseModel):
 
 @documents_router.delete("/document/{file_hash}", response_model=DeleteResponse)
 async def delete_document(file_hash: str):
-    """Delete a document and all its chunks by file hash."""
+    """Delete a document and all its chunks by file hash.
+
+    Returns 409 while the document is still being ingested.
+    """
     try:
-        vectorstore = await get_vectorstore()
-        
-        # Use while loop to delete all chunks with this file_hash in batches
-        total_deleted = 0
-        filename = "Unknown"
-        
-        # Get first batch of chunks with this file_hash
-        batch_docs = await vectorstore.asimilarity_search("", k=1000, filter={"file_hash": file_hash})
-        print(batch_docs)
+        deleted, in_progress = await delete_documents([file_hash])
         
-        if not batch_docs:
+        if in_progress:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Document with hash '{file_hash}' is still being ingested"
+            )
+        if file_hash not in deleted:
             raise HTTPException(
                 status_code=404,
                 detail=f"Document with hash '{file_hash}' not found"
             )
         
-        filename = batch_docs[0].metadata.get("source_filename", "Unknown")
-        
-        # Keep deleting batches until no more chunks remain
-        while batch_docs:
-            doc_ids = [doc.id for doc in batch_docs]
-            
-            # Delete this batch
-            await vectorstore.adelete(ids=doc_ids)
-            batch_deleted = len(doc_ids)
-            total_deleted += batch_deleted
-            
-            logger.info(f"Deleted batch of {batch_deleted} chunks (total so far: {total_deleted})")
-            
-            # Get next batch for the next iteration
-            batch_docs = await vectorstore.asimilarity_search("", k=1000, filter={"file_hash": file_hash})
-        
-        
+        bump_corpus_version()
+        filename = deleted[file_hash]["filename"]
+        total_deleted = deleted[file_hash]["deleted_chunks"]
         logger.info(f"Deleted {total_deleted} chunks for document: {filename} (hash: {file_hash})")
         
         return DeleteResponse(
@@ -189,3 +259,47 @@ async def delete_document(file_hash: str):
             status_code=500,
             detail=f"Failed to delete document: {str(e)}"
         )
+
+class BatchDeleteRequest(BaseModel):
+    file_hashes: List[str] = Field(..., min_length=1, max_length=1000)
+
+class BatchDeleteResponse(BaseModel):
+    deleted: List[DeleteResponse]
+    not_found: List[str]
+    # Still being ingested, so left in place
+    in_progress: List[str] = []
+    deleted_chunks: int
+
+@documents_router.post("/documents/delete", response_model=BatchDeleteResponse)
+async def delete_documents_batch(request: BatchDeleteRequest):
+    """Delete many documents and all their chunks in a single transaction."""
+    try:
+        file_hashes = list(dict.fromkeys(request.file_hashes))
+        deleted, in_progress = await delete_documents(file_hashes)
+        
+        if deleted:
+            bump_corpus_version()
+        
+        return BatchDeleteResponse(
+            deleted=[
+                DeleteResponse(
+                    filename=info["filename"],
+                    deleted_chunks=info["deleted_chunks"],
+                    message=f"Successfully deleted {info['deleted_chunks']} chunks"
+                )
+                for info in deleted.values()
+            ],
+            not_found=[
+                file_hash for file_hash in file_hashes
+                if file_hash not in deleted and file_hash not in in_progress
+            ],
+            in_progress=in_progress,
+            deleted_chunks=sum(info["deleted_chunks"] for info in deleted.values())
+        )
+        
+    except Exception as e:
+        logger.error(f"Error deleting {len(request.file_hashes)} documents: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to delete documents: {str(e)}"
+        )
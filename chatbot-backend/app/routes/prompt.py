@@ -1,23 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Dict, Any, Literal, Tuple, AsyncIterator, Awaitable, TypeVar
 from langchain_ollama import ChatOllama
+from langchain_postgres import PGVector
 from langchain.schema import HumanMessage, AIMessage, SystemMessage
 from app.services.llm import search_documents, get_chat_model
-from app.services.conversation import (
-    create_conversation, add_message, get_conversation_history, 
-    conversation_exists
+from app.services.reranker import rerank, RERANK_ENABLED, RERANK_CANDIDATES, RERANK_TOP_N
+from app.services.context import assemble_context, estimate_tokens
+from app.services.answer_cache import lookup_cached_answer, store_cached_answer
+from app.services.conversation import PromptUnitOfWork, ConversationNotFoundError
+from app.services.summary import schedule_summary_refresh, CONVERSATION_HISTORY_WINDOW
+from app.services.llm_scheduler import (
+    get_llm_scheduler, LLMSlot, LLMQueueFullError, LLMQueueTimeoutError, LLM_CANCELLATIONS
 )
 from app.db.vectorstore import get_vectorstore
-from app.db.models import MessageRole
+from app.metrics import PROMPT_STAGE_SECONDS, CHUNKS_RETRIEVED, PROMPT_CHARACTERS, PROMPT_TOKENS
+from contextlib import aclosing
+import asyncio
 import logging
+import json
 import os
+import time
 
 logger = logging.getLogger(__name__)
 
 class PromptRequest(BaseModel):
     question: str
     conversation_id: Optional[str] = None
+    retrieval_mode: Optional[Literal["vector", "hybrid"]] = None
 
 class PromptResponse(BaseModel):
     question: str
@@ -26,77 +37,219 @@ class PromptResponse(BaseModel):
 
 prompt_router = APIRouter()
 
+SYSTEM_PROMPT = """You are a helpful AI assistant. Answer the user's question based on the provided context from documents and the conversation history. 
+        If the context doesn't contain relevant information, say so. Keep your answer concise and accurate."""
+
+T = TypeVar("T")
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client went away before the response was ready."""
+
+async def run_until_disconnected(http_request: Request, awaitable: Awaitable[T]) -> T:
+    """Await `awaitable`, cancelling it if the client disconnects first."""
+    task = asyncio.ensure_future(awaitable)
+    
+    async def wait_for_disconnect() -> None:
+        while (await http_request.receive())["type"] != "http.disconnect":
+            pass
+    
+    watcher = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            # Let the task unwind so held slots and upstream requests are released
+            await asyncio.gather(task, return_exceptions=True)
+            raise ClientDisconnectedError()
+    return task.result()
+
+async def acquire_llm_slot() -> LLMSlot:
+    """Wait for an LLM generation slot, mapping overload to 429/503 with Retry-After."""
+    try:
+        return await get_llm_scheduler().acquire("interactive")
+    except LLMQueueFullError as e:
+        logger.warning(f"Rejected question: {str(e)}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except LLMQueueTimeoutError as e:
+        logger.warning(f"Rejected question: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+class SlotStreamingResponse(StreamingResponse):
+    """Streaming response that releases its LLM slot however the response ends.
+
+    The body generator releases the slot too, but it never runs if the
+    client is gone before the first chunk is sent.
+    """
+
+    def __init__(self, content, slot: Optional[LLMSlot], **kwargs):
+        super().__init__(content, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.slot is not None:
+                self.slot.release()
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def build_prompt_messages(
+    request: PromptRequest,
+    vectorstore: PGVector
+) -> Tuple[PromptUnitOfWork, List[Dict[str, Any]], List[Dict[str, Any]], list]:
+    """Resolve the conversation, retrieve context and build the LLM message list.
+
+    Returns the retrieved chunks as well as the ones assembled into the
+    prompt. Merging keeps only the first id of merged chunks, so the
+    semantic answer cache is keyed on the retrieved set.
+    """
+    # Load the conversation's summary and latest history in one round trip;
+    # new conversations are only written once the answer is saved
+    unit_of_work = PromptUnitOfWork(request.conversation_id)
+    try:
+        with PROMPT_STAGE_SECONDS.time(stage="conversation_lookup"):
+            await unit_of_work.load(history_limit=CONVERSATION_HISTORY_WINDOW)
+    except ConversationNotFoundError:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    
+    # Search for relevant documents with similarity threshold
+    # Get up to 10 documents but only keep those above similarity threshold
+    similarity_threshold = float(os.getenv("RAG_SIMILARITY_THRESHOLD", "0.7"))
+    logger.info(f"Using similarity threshold: {similarity_threshold}")
+    
+    # With reranking enabled, over-fetch candidates and keep the best few
+    document_chunks = await search_documents(
+        request.question, 
+        vectorstore, 
+        k=RERANK_CANDIDATES if RERANK_ENABLED else 10, 
+        similarity_threshold=similarity_threshold,
+        retrieval_mode=request.retrieval_mode
+    )
+    if RERANK_ENABLED:
+        with PROMPT_STAGE_SECONDS.time(stage="rerank"):
+            document_chunks = await rerank(request.question, document_chunks, top_n=RERANK_TOP_N)
+    
+    assembly_started = time.perf_counter()
+    
+    # The rolling summary and the latest messages not yet folded into it
+    summary, history = unit_of_work.summary, unit_of_work.history
+    
+    # Fit documents and history into the model's context budget
+    retrieved_chunks = document_chunks
+    document_chunks, history = assemble_context(
+        retrieved_chunks, history, reserved_text=SYSTEM_PROMPT + (summary or "") + request.question
+    )
+    
+    # Build context from documents and messages
+    if document_chunks:
+        context = "\n\n".join([
+            f"Source: {chunk['source_filename']} (Relevance: {chunk['similarity_score']:.2f})\nContent: {chunk['content']}"
+            for chunk in document_chunks
+        ])
+        current_message = f"""Context from documents: {context}\n\nCurrent question: {request.question}"""
+    else:
+        # No documents met the similarity threshold
+        current_message = f"""No relevant documents were found in the knowledge base for this question. Please answer based on the conversation history if applicable, or indicate that you don't have relevant information.\n\nCurrent question: {request.question}"""
+    
+    # Build messages with conversation history
+    messages = [SystemMessage(content=SYSTEM_PROMPT)]
+    if summary:
+        messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+    
+    # Add conversation history
+    for msg in history:
+        if msg["role"] == "user":
+            messages.append(HumanMessage(content=msg["content"]))
+        elif msg["role"] == "llm":
+            messages.append(AIMessage(content=msg["content"]))
+    
+    # Add current question with document context
+    messages.append(HumanMessage(content=current_message))
+    
+    PROMPT_STAGE_SECONDS.observe(time.perf_counter() - assembly_started, stage="prompt_assembly")
+    CHUNKS_RETRIEVED.inc(len(document_chunks), phase="in_context")
+    prompt_text = "".join(message.content for message in messages)
+    PROMPT_CHARACTERS.inc(len(prompt_text))
+    PROMPT_TOKENS.inc(estimate_tokens(prompt_text))
+    
+    return unit_of_work, retrieved_chunks, document_chunks, messages
+
+async def stream_answer(chat_model: ChatOllama, messages: list) -> AsyncIterator[str]:
+    """Stream answer chunks from the LLM, recording time to first token and total time."""
+    started = time.perf_counter()
+    first_token = True
+    async for chunk in chat_model.astream(messages):
+        if not chunk.content:
+            continue
+        if first_token:
+            PROMPT_STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_first_token")
+            first_token = False
+        yield chunk.content
+    PROMPT_STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_total")
+
 @prompt_router.post("/prompt", response_model=PromptResponse)
 async def ask_question(
     request: PromptRequest,
-    chat_model: ChatOllama = Depends(get_chat_model)
+    http_request: Request,
+    chat_model: ChatOllama = Depends(get_chat_model),
+    vectorstore: PGVector = Depends(get_vectorstore)
 ):
-    """Ask a question and get an AI-generated answer based on uploaded documents."""
+    """Ask a question and get an AI-generated answer based on uploaded documents.
+
+    Generation waits for a slot from the LLM scheduler; when it is
+    overloaded the request is rejected with 429 or 503 and a Retry-After
+    header. If the client disconnects, the request is cancelled, including
+    a generation that is already running.
+    """
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty")
     
     try:
-        # Get or create conversation
-        if request.conversation_id:
-            if not await conversation_exists(request.conversation_id):
-                raise HTTPException(status_code=404, detail="Conversation not found")
-            conv_id = request.conversation_id
-        else:
-            conv_id = await create_conversation()
-        
-        # Get vectorstore with connection from pool
-        vectorstore = await get_vectorstore()
-        
-        # Search for relevant documents with similarity threshold
-        # Get up to 10 documents but only keep those above similarity threshold
-        similarity_threshold = float(os.getenv("RAG_SIMILARITY_THRESHOLD", "0.7"))
-        logger.info(f"Using similarity threshold: {similarity_threshold}")
-        
-        document_chunks = await search_documents(
-            request.question, 
-            vectorstore, 
-            k=10, 
-            similarity_threshold=similarity_threshold
+        return await run_until_disconnected(
+            http_request, answer_question(request, chat_model, vectorstore)
         )
+    except ClientDisconnectedError:
+        LLM_CANCELLATIONS.inc()
+        logger.info(f"Client disconnected, cancelled question '{request.question[:50]}'")
+        raise HTTPException(status_code=499, detail="Client closed request")
+
+async def answer_question(
+    request: PromptRequest,
+    chat_model: ChatOllama,
+    vectorstore: PGVector
+) -> PromptResponse:
+    started = time.perf_counter()
+    try:
+        unit_of_work, retrieved_chunks, document_chunks, messages = await build_prompt_messages(request, vectorstore)
+        conv_id = unit_of_work.conversation_id
         
-        # Get conversation history for context
-        history = await get_conversation_history(conv_id, limit=10)
-        
-        # Build context from documents and messages
-        if document_chunks:
-            context = "\n\n".join([
-                f"Source: {chunk['source_filename']} (Relevance: {chunk['similarity_score']:.2f})\nContent: {chunk['content']}"
-                for chunk in document_chunks
-            ])
-            current_message = f"""Context from documents: {context}\n\nCurrent question: {request.question}"""
-        else:
-            # No documents met the similarity threshold
-            current_message = f"""No relevant documents were found in the knowledge base for this question. Please answer based on the conversation history if applicable, or indicate that you don't have relevant information.\n\nCurrent question: {request.question}"""
-        
-        # Build messages with conversation history
-        messages = [
-            SystemMessage(content="""You are a helpful AI assistant. Answer the user's question based on the provided context from documents and the conversation history. 
-            If the context doesn't contain relevant information, say so. Keep your answer concise and accurate.""")
-            ]
-        
-        # Add conversation history
-        for msg in history:
-            if msg["role"] == "user":
-                messages.append(HumanMessage(content=msg["content"]))
-            elif msg["role"] == "llm":
-                messages.append(AIMessage(content=msg["content"]))
-        
-        # Add current question with document context
-        messages.append(HumanMessage(content=current_message))
+        # First-turn questions may be answered from the semantic cache
+        is_first_turn = request.conversation_id is None
+        answer = None
+        if is_first_turn:
+            answer = await lookup_cached_answer(request.question, retrieved_chunks)
         
-        # Generate answer using LLM
-        response = await chat_model.ainvoke(messages)
-        answer = response.content.strip()
+        if answer is None:
+            # Generate answer using LLM, streamed internally to measure time to first token
+            slot = await acquire_llm_slot()
+            try:
+                answer = "".join([part async for part in stream_answer(chat_model, messages)]).strip()
+            finally:
+                slot.release()
+            if is_first_turn:
+                await store_cached_answer(request.question, retrieved_chunks, answer)
         
-        # Save messages to conversation
-        await add_message(conv_id, MessageRole.USER, request.question)
-        await add_message(conv_id, MessageRole.LLM, answer)
+        # Save both messages to the conversation in one statement
+        with PROMPT_STAGE_SECONDS.time(stage="persistence"):
+            await unit_of_work.save_turn(request.question, answer)
+        schedule_summary_refresh(conv_id, len(unit_of_work.history) + 2)
         
+        PROMPT_STAGE_SECONDS.observe(time.perf_counter() - started, stage="total")
         logger.info(f"Generated answer for conversation {conv_id}")
         
         return PromptResponse(
@@ -112,4 +265,105 @@ async def ask_question(
         raise HTTPException(
             status_code=500,
             detail=f"Failed to process question: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@prompt_router.post("/prompt/stream")
+async def ask_question_stream(
+    request: PromptRequest,
+    chat_model: ChatOllama = Depends(get_chat_model),
+    vectorstore: PGVector = Depends(get_vectorstore)
+):
+    """Ask a question and stream the answer back as server-sent events.
+
+    Emits a `sources` event with the retrieved chunks first, then one `token`
+    event per generated chunk, and finally a `done` event. The full answer is
+    persisted once the stream has completed. The LLM slot is acquired before
+    the stream starts, so overload is reported as 429/503 with Retry-After;
+    a client disconnect closes the upstream generation.
+    """
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    
+    started = time.perf_counter()
+    try:
+        unit_of_work, retrieved_chunks, document_chunks, messages = await build_prompt_messages(request, vectorstore)
+        conv_id = unit_of_work.conversation_id
+        
+        is_first_turn = request.conversation_id is None
+        cached_answer = None
+        if is_first_turn:
+            cached_answer = await lookup_cached_answer(request.question, retrieved_chunks)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing question '{request.question}': {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process question: {str(e)}"
+        )
+    
+    slot = await acquire_llm_slot() if cached_answer is None else None
+    
+    async def event_stream():
+        try:
+            yield format_sse("sources", {
+                "conversation_id": conv_id,
+                "sources": [
+                    {
+                        "source_filename": chunk["source_filename"],
+                        "similarity_score": chunk["similarity_score"],
+                        "content": chunk["content"]
+                    }
+                    for chunk in document_chunks
+                ]
+            })
+            
+            answer_parts = []
+            try:
+                if cached_answer is not None:
+                    answer_parts.append(cached_answer)
+                    yield format_sse("token", {"content": cached_answer})
+                else:
+                    # Closing the generator early closes the upstream Ollama request
+                    async with aclosing(stream_answer(chat_model, messages)) as contents:
+                        async for content in contents:
+                            answer_parts.append(content)
+                            yield format_sse("token", {"content": content})
+                    slot.release()
+            except Exception as e:
+                logger.error(f"Error streaming answer for conversation {conv_id}: {str(e)}")
+                yield format_sse("error", {"detail": f"Failed to generate answer: {str(e)}"})
+                return
+            
+            answer = "".join(answer_parts).strip()
+            if is_first_turn and cached_answer is None:
+                await store_cached_answer(request.question, retrieved_chunks, answer)
+            
+            # Save messages to conversation once the full answer is known
+            with PROMPT_STAGE_SECONDS.time(stage="persistence"):
+                await unit_of_work.save_turn(request.question, answer)
+            schedule_summary_refresh(conv_id, len(unit_of_work.history) + 2)
+            
+            PROMPT_STAGE_SECONDS.observe(time.perf_counter() - started, stage="total")
+            logger.info(f"Streamed answer for conversation {conv_id}")
+            yield format_sse("done", {"conversation_id": conv_id, "answer": answer})
+        except (asyncio.CancelledError, GeneratorExit):
+            # The server cancels or closes the stream when the client disconnects
+            LLM_CANCELLATIONS.inc()
+            logger.info(f"Client disconnected, cancelled answer for conversation {conv_id}")
+            raise
+        finally:
+            if slot is not None:
+                slot.release()
+    
+    try:
+        return SlotStreamingResponse(
+            event_stream(),
+            slot,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    except BaseException:
+        if slot is not None:
+            slot.release()
+        raise
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.connection import get_async_engine, get_ingest_engine
+from app.db.models import AnswerCacheEntry
+from app.services.embedding_service import get_embedding_service
+from app.services.retrieval_cache import get_query_embedding
+from app.metrics import CACHE_REQUESTS
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_MAX_DISTANCE = float(os.getenv("SEMANTIC_CACHE_MAX_DISTANCE", "0.05"))
+SEMANTIC_CACHE_CANDIDATES = int(os.getenv("SEMANTIC_CACHE_CANDIDATES", "5"))
+# Cached answers older than this are ignored and pruned
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+SEMANTIC_CACHE_PRUNE_INTERVAL_SECONDS = float(os.getenv("SEMANTIC_CACHE_PRUNE_INTERVAL_SECONDS", "3600"))
+
+_hits = 0
+_misses = 0
+_prune_task: Optional[asyncio.Task] = None
+
+def get_async_session() -> AsyncSession:
+    """Get async database session."""
+    engine = get_async_engine()
+    return AsyncSession(engine)
+
+async def lookup_cached_answer(question: str, document_chunks: List[Dict[str, Any]]) -> Optional[str]:
+    """Find a cached answer to a near-duplicate question over the same chunks.
+
+    A cached answer is only reused when the question embedding is within
+    SEMANTIC_CACHE_MAX_DISTANCE (cosine), the retrieved chunk set is
+    identical to the one the answer was generated from, and the answer is
+    younger than SEMANTIC_CACHE_TTL_SECONDS.
+    """
+    global _hits, _misses
+
+    if not SEMANTIC_CACHE_ENABLED or not document_chunks:
+        return None
+
+    embedding = await get_query_embedding(question, get_embedding_service())
+    chunk_ids = {chunk["id"] for chunk in document_chunks}
+    distance = AnswerCacheEntry.question_embedding.cosine_distance(embedding)
+
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(AnswerCacheEntry.chunk_ids, AnswerCacheEntry.answer)
+            .where(distance <= SEMANTIC_CACHE_MAX_DISTANCE)
+            .where(AnswerCacheEntry.created_at >= func.now() - timedelta(seconds=SEMANTIC_CACHE_TTL_SECONDS))
+            .order_by(distance)
+            .limit(SEMANTIC_CACHE_CANDIDATES)
+        )
+        candidates = result.all()
+
+    for cached_chunk_ids, answer in candidates:
+        if set(cached_chunk_ids) == chunk_ids:
+            _hits += 1
+            CACHE_REQUESTS.inc(cache="answers", result="hit")
+            logger.info(f"Semantic cache hit for question: {question[:50]}...")
+            return answer
+
+    _misses += 1
+    CACHE_REQUESTS.inc(cache="answers", result="miss")
+    return None
+
+async def store_cached_answer(question: str, document_chunks: List[Dict[str, Any]], answer: str) -> None:
+    """Store a generated answer together with the chunks it was based on."""
+    if not SEMANTIC_CACHE_ENABLED or not document_chunks:
+        return
+
+    embedding = await get_query_embedding(question, get_embedding_service())
+    async with get_async_session() as session:
+        session.add(AnswerCacheEntry(
+            question=question,
+            question_embedding=embedding,
+            chunk_ids=[chunk["id"] for chunk in document_chunks],
+            file_hashes=sorted({chunk["metadata"].get("file_hash", "") for chunk in document_chunks}),
+            answer=answer
+        ))
+        await session.commit()
+
+async def prune_answer_cache() -> int:
+    """Delete cached answers older than SEMANTIC_CACHE_TTL_SECONDS."""
+    async with AsyncSession(get_ingest_engine()) as session:
+        result = await session.execute(
+            delete(AnswerCacheEntry)
+            .where(AnswerCacheEntry.created_at < func.now() - timedelta(seconds=SEMANTIC_CACHE_TTL_SECONDS))
+        )
+        await session.commit()
+    if result.rowcount:
+        logger.info(f"Pruned {result.rowcount} expired cached answers")
+    return result.rowcount
+
+async def _prune_periodically() -> None:
+    while True:
+        try:
+            await prune_answer_cache()
+        except Exception as e:
+            logger.warning(f"Failed to prune the answer cache: {str(e)}")
+        await asyncio.sleep(SEMANTIC_CACHE_PRUNE_INTERVAL_SECONDS)
+
+def start_answer_cache_pruning() -> None:
+    """Prune expired cached answers now and then every SEMANTIC_CACHE_PRUNE_INTERVAL_SECONDS."""
+    global _prune_task
+
+    if not SEMANTIC_CACHE_ENABLED or SEMANTIC_CACHE_PRUNE_INTERVAL_SECONDS <= 0 or _prune_task is not None:
+        return
+    _prune_task = asyncio.create_task(_prune_periodically())
+
+async def stop_answer_cache_pruning() -> None:
+    global _prune_task
+
+    if _prune_task is not None:
+        _prune_task.cancel()
+        await asyncio.gather(_prune_task, return_exceptions=True)
+        _prune_task = None
+
+def get_answer_cache_stats() -> dict:
+    """Get semantic answer cache statistics."""
+    return {
+        "enabled": SEMANTIC_CACHE_ENABLED,
+        "ttl_seconds": SEMANTIC_CACHE_TTL_SECONDS,
+        "hits": _hits,
+        "misses": _misses
+    }
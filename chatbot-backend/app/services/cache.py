@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from app.metrics import CACHE_REQUESTS
+
+class LRUCache:
+    """Bounded in-process LRU cache with optional per-entry TTL and hit/miss counters.
+
+    Not thread-safe; it is only meant to be used from the event loop. Named
+    caches also report lookups to the `rag_cache_requests_total` metric.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: Optional[float] = None, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self._record_miss()
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            self._record_miss()
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        if self.name:
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+        return value
+
+    def _record_miss(self) -> None:
+        self.misses += 1
+        if self.name:
+            CACHE_REQUESTS.inc(cache=self.name, result="miss")
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0
+        }
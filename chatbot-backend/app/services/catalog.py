@@ -0,0 +1,243 @@
+import base64
+import json
+import logging
+import os
+from datetime import timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import delete, func, literal_column, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.connection import get_async_engine, get_ingest_engine
+from app.db.models import Document, DocumentStatus, AnswerCacheEntry
+from app.db.vectorstore import get_collection_id
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# A claim older than this is assumed to belong to a crashed ingestion and may be taken over
+INGEST_CLAIM_TIMEOUT_SECONDS = int(os.getenv("INGEST_CLAIM_TIMEOUT_SECONDS", "3600"))
+
+def get_async_session() -> AsyncSession:
+    """Get async database session."""
+    engine = get_async_engine()
+    return AsyncSession(engine)
+
+def encode_cursor(filename: str, file_hash: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([filename, file_hash]).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a listing cursor, raising ValueError if it is malformed."""
+    try:
+        filename, file_hash = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(filename), str(file_hash)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _document_to_dict(document: Document) -> Dict:
+    return {
+        "filename": document.filename,
+        "file_hash": document.file_hash,
+        "page_count": document.page_count,
+        "chunk_count": document.chunk_count,
+        "size_bytes": document.size_bytes,
+        "uploaded_at": document.uploaded_at
+    }
+
+async def document_exists(file_hash: str) -> bool:
+    """Check whether a document is catalogued or being ingested, by primary key."""
+    async with AsyncSession(get_ingest_engine()) as session:
+        result = await session.execute(
+            select(Document.file_hash).where(Document.file_hash == file_hash)
+        )
+        return result.scalar_one_or_none() is not None
+
+async def claim_document(file_hash: str, filename: str, size_bytes: Optional[int] = None) -> bool:
+    """Reserve a file hash for ingestion.
+
+    Inserts an INGESTING catalog row, relying on the primary key so that of
+    several concurrent uploads of the same file exactly one gets the claim.
+    Returns False if the document already exists or is being ingested. A
+    claim left behind by a crashed ingestion is taken over once it is older
+    than INGEST_CLAIM_TIMEOUT_SECONDS. Whenever a claim is granted, chunks
+    left behind for the hash by an earlier interrupted ingestion are removed.
+    """
+    stmt = insert(Document).values(
+        file_hash=file_hash,
+        filename=filename[:255],
+        page_count=0,
+        chunk_count=0,
+        size_bytes=size_bytes,
+        status=DocumentStatus.INGESTING
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["file_hash"],
+        set_={
+            "filename": stmt.excluded.filename,
+            "size_bytes": stmt.excluded.size_bytes,
+            "uploaded_at": func.now()
+        },
+        where=(Document.status == DocumentStatus.INGESTING)
+        & (Document.uploaded_at < func.now() - timedelta(seconds=INGEST_CLAIM_TIMEOUT_SECONDS))
+    ).returning(literal_column("xmax = 0").label("inserted"))
+
+    collection_id = await get_collection_id()
+    async with get_ingest_engine().begin() as conn:
+        claimed = (await conn.execute(stmt)).first()
+        if claimed is not None:
+            # Uses the file_hash expression index, so this is cheap when nothing is left over
+            result = await conn.execute(
+                text("""
+                    DELETE FROM langchain_pg_embedding
+                    WHERE collection_id = CAST(:collection_id AS uuid)
+                      AND cmetadata->>'file_hash' = :file_hash
+                """),
+                {"collection_id": collection_id, "file_hash": file_hash}
+            )
+            if result.rowcount or not claimed.inserted:
+                logger.warning(
+                    f"{'Claimed' if claimed.inserted else 'Took over stale ingestion claim for'} "
+                    f"{file_hash[:12]}..., removed {result.rowcount} leftover chunks"
+                )
+
+    return claimed is not None
+
+async def release_document_claim(file_hash: str) -> None:
+    """Drop an ingestion claim that did not lead to a stored document."""
+    async with AsyncSession(get_ingest_engine()) as session:
+        await session.execute(
+            delete(Document)
+            .where(Document.file_hash == file_hash)
+            .where(Document.status == DocumentStatus.INGESTING)
+        )
+        await session.commit()
+
+async def record_document(
+    file_hash: str,
+    filename: str,
+    page_count: int,
+    chunk_count: int,
+    size_bytes: Optional[int] = None
+) -> None:
+    """Add or update a document in the catalog and mark it ready."""
+    async with AsyncSession(get_ingest_engine()) as session:
+        stmt = insert(Document).values(
+            file_hash=file_hash,
+            filename=filename[:255],
+            page_count=page_count,
+            chunk_count=chunk_count,
+            size_bytes=size_bytes,
+            status=DocumentStatus.READY
+        )
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=["file_hash"],
+            set_={
+                "filename": stmt.excluded.filename,
+                "page_count": stmt.excluded.page_count,
+                "chunk_count": stmt.excluded.chunk_count,
+                "size_bytes": stmt.excluded.size_bytes,
+                "status": stmt.excluded.status
+            }
+        ))
+        await session.commit()
+
+    logger.info(f"Recorded document {filename} ({file_hash[:12]}...) in catalog")
+
+async def get_existing_file_hashes(file_hashes: List[str]) -> Set[str]:
+    """Get the subset of file hashes whose documents are fully ingested.
+
+    Documents still being ingested are left out, so a claim left behind by a
+    crashed run does not hide the file from a retry.
+    """
+    if not file_hashes:
+        return set()
+    async with AsyncSession(get_ingest_engine()) as session:
+        result = await session.execute(
+            select(Document.file_hash)
+            .where(Document.file_hash.in_(file_hashes))
+            .where(Document.status == DocumentStatus.READY)
+        )
+        return set(result.scalars().all())
+
+async def delete_documents(file_hashes: List[str]) -> Tuple[Dict[str, Dict], List[str]]:
+    """Delete documents, their chunks and cached answers in one transaction.
+
+    Documents that are still being ingested are left alone, since the
+    running ingestion would record them again when it finishes. Returns the
+    filename and deleted chunk count for every hash that had chunks, and the
+    hashes skipped because they are being ingested.
+    """
+    engine = get_ingest_engine()
+    collection_id = await get_collection_id()
+    
+    async with engine.begin() as conn:
+        # Locking the claims keeps them from turning READY while we delete
+        in_progress = (await conn.execute(
+            select(Document.file_hash)
+            .where(Document.file_hash.in_(file_hashes))
+            .where(Document.status == DocumentStatus.INGESTING)
+            .where(Document.uploaded_at >= func.now() - timedelta(seconds=INGEST_CLAIM_TIMEOUT_SECONDS))
+            .with_for_update()
+        )).scalars().all()
+        file_hashes = [file_hash for file_hash in file_hashes if file_hash not in in_progress]
+        if not file_hashes:
+            return {}, list(in_progress)
+        
+        result = await conn.execute(
+            text("""
+                WITH deleted AS (
+                    DELETE FROM langchain_pg_embedding
+                    WHERE cmetadata->>'file_hash' = ANY(:file_hashes)
+                      AND collection_id = CAST(:collection_id AS uuid)
+                    RETURNING cmetadata->>'file_hash' AS file_hash,
+                              cmetadata->>'source_filename' AS filename
+                )
+                SELECT file_hash, min(filename), count(*)
+                FROM deleted
+                GROUP BY file_hash
+            """),
+            {"file_hashes": list(file_hashes), "collection_id": collection_id}
+        )
+        deleted = {
+            file_hash: {"filename": filename or "Unknown", "deleted_chunks": count}
+            for file_hash, filename, count in result.all()
+        }
+        
+        await conn.execute(delete(Document).where(Document.file_hash.in_(file_hashes)))
+        await conn.execute(
+            delete(AnswerCacheEntry).where(AnswerCacheEntry.file_hashes.overlap(list(file_hashes)))
+        )
+    
+    logger.info(f"Deleted {sum(d['deleted_chunks'] for d in deleted.values())} chunks for {len(deleted)} documents")
+    return deleted, list(in_progress)
+
+async def list_documents_page(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """List catalog documents ordered by filename, one keyset page at a time.
+
+    Returns the page and the cursor for the next page, or None on the last
+    page. Without a limit every remaining document is returned.
+    """
+    query = (
+        select(Document)
+        .where(Document.status == DocumentStatus.READY)
+        .order_by(Document.filename, Document.file_hash)
+    )
+    if limit is not None:
+        query = query.limit(limit + 1)
+    if cursor:
+        query = query.where(tuple_(Document.filename, Document.file_hash) > decode_cursor(cursor))
+
+    async with get_async_session() as session:
+        result = await session.execute(query)
+        documents = result.scalars().all()
+
+    next_cursor = None
+    if limit is not None and len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1].filename, documents[-1].file_hash)
+
+    return [_document_to_dict(document) for document in documents], next_cursor
@@ -0,0 +1,174 @@
+import logging
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.ollama_client import OLLAMA_NUM_CTX
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Tokens kept free in the model's context window for the generated answer
+RAG_ANSWER_RESERVE_TOKENS = int(os.getenv("RAG_ANSWER_RESERVE_TOKENS", "2048"))
+# Tokens available for the prompt (system prompt, summary, history, documents
+# and question), i.e. OLLAMA_NUM_CTX minus room for the answer. A configured
+# budget is capped there, since Ollama would truncate anything beyond it
+RAG_CONTEXT_TOKEN_BUDGET = min(
+    int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", str(OLLAMA_NUM_CTX - RAG_ANSWER_RESERVE_TOKENS))),
+    OLLAMA_NUM_CTX - RAG_ANSWER_RESERVE_TOKENS
+)
+# Share of the budget left after the system prompt and question that goes
+# to retrieved documents; the rest goes to conversation history
+RAG_CONTEXT_DOCUMENT_SHARE = float(os.getenv("RAG_CONTEXT_DOCUMENT_SHARE", "0.7"))
+RAG_CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("RAG_CONTEXT_DUPLICATE_THRESHOLD", "0.85"))
+
+# Rough average for English text; avoids loading the model's tokenizer
+CHARS_PER_TOKEN = 4
+# "Source: ... (Relevance: ...)" header added per chunk in the prompt
+CHUNK_OVERHEAD_TOKENS = 16
+MESSAGE_OVERHEAD_TOKENS = 4
+
+MIN_CHUNK_OVERLAP = 10
+MAX_CHUNK_OVERLAP = 200
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _join_overlapping(first: str, second: str) -> Optional[str]:
+    """Join two texts if the end of the first repeats the start of the second."""
+    longest = min(len(first), len(second), MAX_CHUNK_OVERLAP)
+    for size in range(longest, MIN_CHUNK_OVERLAP - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return None
+
+def _same_page(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return (
+        a["metadata"].get("file_hash") == b["metadata"].get("file_hash")
+        and a["metadata"].get("page") == b["metadata"].get("page")
+    )
+
+def merge_adjacent_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge chunks from the same page whose text overlaps at the boundary.
+
+    The splitter repeats up to chunk_overlap characters between neighbouring
+    chunks, so merging them removes the repeated text. Merged chunks keep the
+    position and best score of their highest ranked part.
+    """
+    merged: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        chunk = {**chunk, "merged_ids": [chunk["id"]]}
+        # A new chunk can bridge two earlier ones, so keep merging until stable
+        while True:
+            for index, existing in enumerate(merged):
+                if not _same_page(existing, chunk):
+                    continue
+                text = (
+                    _join_overlapping(existing["content"], chunk["content"])
+                    or _join_overlapping(chunk["content"], existing["content"])
+                )
+                if text is None:
+                    continue
+                chunk = {
+                    **existing,
+                    "content": text,
+                    "similarity_score": max(existing["similarity_score"], chunk["similarity_score"]),
+                    "merged_ids": existing["merged_ids"] + chunk["merged_ids"]
+                }
+                del merged[index]
+                break
+            else:
+                break
+        merged.append(chunk)
+
+    # Restore rank order, since merging moved chunks to the end
+    order = {chunk["id"]: position for position, chunk in enumerate(chunks)}
+    merged.sort(key=lambda chunk: min(order[merged_id] for merged_id in chunk["merged_ids"]))
+    return merged
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = text.lower().split()
+    if len(words) < size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def drop_near_duplicates(
+    chunks: List[Dict[str, Any]],
+    threshold: float = RAG_CONTEXT_DUPLICATE_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """Drop chunks whose word shingles are mostly covered by a higher ranked chunk."""
+    kept: List[Tuple[Dict[str, Any], set]] = []
+    for chunk in chunks:
+        shingles = _shingles(chunk["content"])
+        is_duplicate = any(
+            len(shingles & other) / len(shingles) >= threshold
+            for _, other in kept
+        )
+        if not is_duplicate:
+            kept.append((chunk, shingles))
+    return [chunk for chunk, _ in kept]
+
+def assemble_context(
+    chunks: List[Dict[str, Any]],
+    history: List[Dict[str, Any]],
+    reserved_text: str = "",
+    token_budget: int = RAG_CONTEXT_TOKEN_BUDGET,
+    document_share: float = RAG_CONTEXT_DOCUMENT_SHARE
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Fit retrieved chunks and conversation history into a token budget.
+
+    `reserved_text` (system prompt and question) is always sent and is taken
+    off the budget first. Chunks are merged and deduplicated, then added in
+    rank order; a merged chunk that doesn't fit falls back to whichever of
+    its original chunks still do. History is filled newest first so the
+    oldest messages are the ones dropped. Budget one side doesn't use goes
+    to the other.
+    """
+    available = max(0, token_budget - estimate_tokens(reserved_text))
+    # Original chunks by id, in rank order
+    originals = {chunk["id"]: chunk for chunk in chunks}
+    rank = {chunk_id: position for position, chunk_id in enumerate(originals)}
+    chunks = drop_near_duplicates(merge_adjacent_chunks(chunks))
+
+    def chunk_cost(chunk: Dict[str, Any]) -> int:
+        return estimate_tokens(chunk["content"]) + CHUNK_OVERHEAD_TOKENS
+
+    def message_cost(message: Dict[str, Any]) -> int:
+        return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    history_cost = sum(message_cost(message) for message in history)
+    document_budget = max(int(available * document_share), available - history_cost)
+
+    selected_chunks, used = [], 0
+    for chunk in chunks:
+        cost = chunk_cost(chunk)
+        if used + cost <= document_budget:
+            selected_chunks.append(chunk)
+            used += cost
+            continue
+        if len(chunk["merged_ids"]) == 1:
+            continue
+        for part_id in sorted(chunk["merged_ids"], key=rank.get):
+            part = originals[part_id]
+            cost = chunk_cost(part)
+            if used + cost <= document_budget:
+                selected_chunks.append(part)
+                used += cost
+
+    history_budget = available - used
+    selected_history, history_used = [], 0
+    for message in reversed(history):
+        cost = message_cost(message)
+        if history_used + cost > history_budget:
+            break
+        selected_history.append(message)
+        history_used += cost
+    selected_history.reverse()
+
+    logger.info(
+        f"Assembled context: {len(selected_chunks)}/{len(chunks)} chunks ({used} tokens), "
+        f"{len(selected_history)}/{len(history)} messages ({history_used} tokens) "
+        f"of {available} available"
+    )
+    return selected_chunks, selected_history
@@ -1,10 +1,9 @@
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timezone
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, text, update
 from app.db.models import Conversation, Message, MessageRole
 from app.db.connection import get_async_engine
 
@@ -21,59 +20,30 @@ def create_conversation_id() -> str:
     logger.info(f"Generated conversation ID: {conv_id}")
     return conv_id
 
-async def create_conversation(title: Optional[str] = None) -> str:
-    """Create a new conversation and return its ID."""
-    conv_id = create_conversation_id()
-    
-    async with get_async_session() as session:
-        conversation = Conversation(
-            id=conv_id,
-            title=title
-        )
-        session.add(conversation)
-        await session.commit()
-        
-    logger.info(f"Created conversation: {conv_id}")
-    return conv_id
-
-async def add_message(conversation_id: str, role: MessageRole, content: str) -> None:
-    """Add a message to a conversation."""
-    async with get_async_session() as session:
-        # Update conversation's updated_at timestamp
-        await session.execute(
-            update(Conversation)
-            .where(Conversation.id == conversation_id)
-            .values(updated_at=datetime.now(timezone.utc))
-        )
-        
-        # Add the message
-        message = Message(
-            conversation_id=conversation_id,
-            role=role,
-            content=content
-        )
-        session.add(message)
-        await session.commit()
-        
-    logger.info(f"Added {role.value} message to conversation {conversation_id}")
-
 async def get_conversation_history(
     conversation_id: str, 
-    limit: Optional[int] = 50
+    limit: Optional[int] = 50,
+    after_id: Optional[int] = None
     ) -> List[Dict]:
-    """Get conversation messages in chronological order."""
+    """Get the latest messages of a conversation in chronological order.
+
+    With `after_id`, only messages newer than that message are considered,
+    e.g. the ones not yet folded into the conversation summary.
+    """
     async with get_async_session() as session:
         query = (
             select(Message)
             .where(Message.conversation_id == conversation_id)
-            .order_by(Message.created_at)
+            .order_by(Message.created_at.desc(), Message.id.desc())
         )
         
+        if after_id is not None:
+            query = query.where(Message.id > after_id)
         if limit:
             query = query.limit(limit)
             
         result = await session.execute(query)
-        messages = result.scalars().all()
+        messages = list(reversed(result.scalars().all()))
         
         return [
             {
@@ -85,10 +55,126 @@ async def get_conversation_history(
             for msg in messages
         ]
 
-async def conversation_exists(conversation_id: str) -> bool:
-    """Check if a conversation exists."""
+async def get_conversation_summary(conversation_id: str) -> Tuple[Optional[str], Optional[int]]:
+    """Get a conversation's rolling summary and the last message it covers."""
     async with get_async_session() as session:
         result = await session.execute(
-            select(Conversation).where(Conversation.id == conversation_id)
+            select(Conversation.summary, Conversation.summarized_until_id)
+            .where(Conversation.id == conversation_id)
+        )
+        row = result.one_or_none()
+        return (row.summary, row.summarized_until_id) if row else (None, None)
+
+async def update_conversation_summary(conversation_id: str, summary: str, summarized_until_id: int) -> None:
+    """Store a new rolling summary for a conversation."""
+    async with get_async_session() as session:
+        await session.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            # Keep updated_at as is; summarizing isn't conversation activity
+            .values(
+                summary=summary,
+                summarized_until_id=summarized_until_id,
+                updated_at=Conversation.updated_at
+            )
+        )
+        await session.commit()
+
+class ConversationNotFoundError(Exception):
+    """Raised when a prompt refers to a conversation that doesn't exist."""
+
+class PromptUnitOfWork:
+    """Request-scoped unit of work for one question/answer turn.
+
+    Loading an existing conversation fetches its summary and latest history
+    in a single query, and saving the turn upserts the conversation, inserts
+    both messages and bumps updated_at in a single statement. No connection
+    is held while the answer is being generated in between. `round_trips`
+    counts the statements and commits sent to the database.
+    """
+
+    def __init__(self, conversation_id: Optional[str] = None):
+        self.is_new = conversation_id is None
+        self.conversation_id = conversation_id or create_conversation_id()
+        self.summary: Optional[str] = None
+        self.history: List[Dict] = []
+        self.asked_at = datetime.now(timezone.utc)
+        self.round_trips = 0
+
+    async def load(self, history_limit: int) -> None:
+        """Fetch the conversation's summary and unsummarized latest messages."""
+        if self.is_new:
+            return
+
+        async with get_async_session() as session:
+            result = await session.execute(
+                text("""
+                    SELECT c.summary, m.id, m.role, m.content, m.created_at
+                    FROM conversations c
+                    LEFT JOIN LATERAL (
+                        SELECT id, role, content, created_at
+                        FROM messages
+                        WHERE conversation_id = c.id
+                          AND id > coalesce(c.summarized_until_id, 0)
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT :limit
+                    ) m ON true
+                    WHERE c.id = :conversation_id
+                """),
+                {"conversation_id": self.conversation_id, "limit": history_limit}
+            )
+            rows = result.all()
+            self.round_trips += 1
+
+        if not rows:
+            raise ConversationNotFoundError(f"Conversation {self.conversation_id} not found")
+
+        self.summary = rows[0].summary
+        self.history = [
+            {
+                "id": row.id,
+                "role": MessageRole[row.role].value,
+                "content": row.content,
+                "created_at": row.created_at.isoformat()
+            }
+            for row in reversed(rows)
+            if row.id is not None
+        ]
+
+    async def save_turn(self, question: str, answer: str) -> None:
+        """Persist the question and answer, creating the conversation if it's new."""
+        answered_at = datetime.now(timezone.utc)
+
+        async with get_async_session() as session:
+            await session.execute(
+                text("""
+                    WITH conversation AS (
+                        INSERT INTO conversations (id, created_at, updated_at)
+                        VALUES (:conversation_id, :asked_at, :answered_at)
+                        ON CONFLICT (id) DO UPDATE SET updated_at = EXCLUDED.updated_at
+                        RETURNING id
+                    )
+                    INSERT INTO messages (conversation_id, role, content, created_at)
+                    SELECT conversation.id, turn.role::messagerole, turn.content, turn.created_at
+                    FROM conversation,
+                         (VALUES (:user_role, :question, CAST(:asked_at AS timestamptz)),
+                                 (:llm_role, :answer, CAST(:answered_at AS timestamptz)))
+                         AS turn (role, content, created_at)
+                """),
+                {
+                    "conversation_id": self.conversation_id,
+                    "asked_at": self.asked_at,
+                    "answered_at": answered_at,
+                    "user_role": MessageRole.USER.name,
+                    "question": question,
+                    "llm_role": MessageRole.LLM.name,
+                    "answer": answer
+                }
+            )
+            await session.commit()
+            self.round_trips += 2
+
+        logger.info(
+            f"Saved turn to conversation {self.conversation_id} "
+            f"({self.round_trips} database round trips for this request)"
         )
-        return result.scalar_one_or_none() is not None
\ No newline at end of file
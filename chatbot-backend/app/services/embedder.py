@@ -1,85 +1,349 @@
+import asyncio
 import tempfile
 import os
 import logging
 import hashlib
-from langchain_community.document_loaders import PyPDFLoader
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import pypdf
+from fastapi import UploadFile
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
 from langchain_postgres import PGVector
+from app.services.embedding_cache import embed_documents_cached
+from app.services.retrieval_cache import bump_corpus_version
+from app.services.catalog import record_document, claim_document, release_document_claim
+from app.metrics import INGEST_STAGE_SECONDS
+from app.db.vectorstore import copy_embeddings
+from dotenv import load_dotenv
+
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Ingestion pipeline configuration
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+INGEST_MAX_CONCURRENCY = int(os.getenv("INGEST_MAX_CONCURRENCY", str(INGEST_MAX_WORKERS)))
+INGEST_MAX_QUEUE_DEPTH = int(os.getenv("INGEST_MAX_QUEUE_DEPTH", "16"))
+INGEST_STORE_BATCH_SIZE = int(os.getenv("INGEST_STORE_BATCH_SIZE", "256"))
+INGEST_PAGE_BATCH_SIZE = int(os.getenv("INGEST_PAGE_BATCH_SIZE", "16"))
+INGEST_SPOOL_CHUNK_SIZE = int(os.getenv("INGEST_SPOOL_CHUNK_SIZE", str(1024 * 1024)))
+
+# Called with keyword counters such as pages_parsed or chunks_stored
+ProgressCallback = Callable[..., Awaitable[None]]
+
+class IngestQueueFullError(Exception):
+    """Raised when too many uploads are already waiting for an ingestion slot."""
+
+class DocumentExistsError(Exception):
+    """Raised when a document with the same file hash is stored or being ingested."""
+
+class PdfParseError(Exception):
+    """Raised when a PDF cannot be read or split into chunks."""
+
+_ingest_semaphore: Optional[asyncio.Semaphore] = None
+_ingest_waiting = 0
+_ingest_in_progress = 0
+
+@lru_cache()
+def get_ingest_executor() -> ProcessPoolExecutor:
+    """Create the process pool used for CPU-bound PDF parsing and splitting."""
+    executor = ProcessPoolExecutor(max_workers=INGEST_MAX_WORKERS)
+    logger.info(f"Created ingest process pool with max_workers={INGEST_MAX_WORKERS}")
+    return executor
+
+def shutdown_ingest_executor() -> None:
+    """Shut down the ingest process pool if it was started."""
+    if get_ingest_executor.cache_info().currsize:
+        get_ingest_executor().shutdown(wait=False, cancel_futures=True)
+        get_ingest_executor.cache_clear()
+        logger.info("Shut down ingest process pool")
+
+def get_ingest_status() -> dict:
+    """Get ingestion pipeline statistics."""
+    return {
+        "max_workers": INGEST_MAX_WORKERS,
+        "max_concurrency": INGEST_MAX_CONCURRENCY,
+        "max_queue_depth": INGEST_MAX_QUEUE_DEPTH,
+        "in_progress": _ingest_in_progress,
+        "waiting": _ingest_waiting
+    }
+
+def count_pdf_pages(path: str) -> int:
+    """Count the pages of a PDF on disk. Runs inside the ingest process pool."""
+    with open(path, "rb") as pdf_file:
+        return len(pypdf.PdfReader(pdf_file).pages)
+
+def parse_and_split_pages(
+    path: str,
+    filename: str,
+    file_hash: str,
+    start: int,
+    stop: int
+) -> Tuple[List[Document], Dict[str, float]]:
+    """Extract pages [start, stop) of a PDF on disk and split them into chunks.
+
+    Runs inside the ingest process pool, so it must stay a module-level
+    function and only return picklable values. Stage timings are returned
+    to the caller because metrics recorded in the worker process are lost.
+    """
+    started = time.perf_counter()
+    # Passing an open file keeps pypdf reading objects on demand; given a
+    # path it would read the whole file into memory first
+    with open(path, "rb") as pdf_file:
+        reader = pypdf.PdfReader(pdf_file)
+        page_labels = reader.page_labels
+        documents = [
+            Document(
+                page_content=reader.pages[page].extract_text().strip(),
+                metadata={
+                    "source": path,
+                    "total_pages": len(reader.pages),
+                    "page": page,
+                    "page_label": page_labels[page],
+                    "source_filename": filename,
+                    "file_hash": file_hash
+                }
+            )
+            for page in range(start, stop)
+        ]
+    timings = {"parse": time.perf_counter() - started}
+
+    started = time.perf_counter()
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=512,
+        chunk_overlap=50,
+    )
+    splits = text_splitter.split_documents(documents)
+    timings["split"] = time.perf_counter() - started
+    return splits, timings
+
+async def _parsed(future: Awaitable, filename: str):
+    """Await a parse step in the process pool, reporting failures as PdfParseError."""
+    try:
+        return await future
+    except Exception as e:
+        raise PdfParseError(f"Failed to parse PDF {filename}: {str(e)}") from e
+
+def _write_temp_pdf(file_bytes: bytes) -> str:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        tmp.write(file_bytes)
+        return tmp.name
+
 def generate_file_hash(file_bytes: bytes) -> str:
     return hashlib.sha256(file_bytes).hexdigest()
 
-async def check_document_exists(file_hash: str, vectorstore: PGVector) -> bool:
+def generate_file_hash_from_path(path: str) -> str:
+    """Hash a file on disk without reading it into memory at once."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(INGEST_SPOOL_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+async def spool_upload(upload: UploadFile) -> Tuple[str, str, int]:
+    """Copy an upload to a temporary file in chunks, hashing it on the way.
+
+    Returns the temporary file path, the SHA-256 of the contents and the
+    size in bytes. Only one chunk is held in memory at a time.
+    """
+    hasher = hashlib.sha256()
+    size_bytes = 0
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
     try:
-        # Search for documents with this file hash in metadata
-        results = await vectorstore.asimilarity_search("", k=1, filter={"file_hash": file_hash})
-        return len(results) > 0
-    except Exception as e:
-        logger.error(f"Error checking for duplicate document: {str(e)}")
-        return False
+        while chunk := await upload.read(INGEST_SPOOL_CHUNK_SIZE):
+            hasher.update(chunk)
+            size_bytes += len(chunk)
+            await asyncio.to_thread(tmp.write, chunk)
+    except Exception:
+        tmp.close()
+        remove_temp_file(tmp.name)
+        raise
+    tmp.close()
+    return tmp.name, hasher.hexdigest(), size_bytes
 
-async def process_and_store_pdf_file(file_bytes: bytes, filename: str, vectorstore: PGVector) -> int:
-    tmp_path = None
-    
+def remove_temp_file(path: Optional[str]) -> None:
+    """Delete a temporary upload file, logging instead of raising on failure."""
+    if path and os.path.exists(path):
+        try:
+            os.unlink(path)
+            logger.debug(f"Cleaned up temporary file: {path}")
+        except Exception as e:
+            logger.warning(f"Failed to delete temporary file {path}: {str(e)}")
+
+async def process_and_store_pdf_file(
+    file_bytes: bytes,
+    filename: str,
+    vectorstore: PGVector,
+    progress: Optional[ProgressCallback] = None
+) -> int:
+    """Ingest a PDF held in memory. Prefer process_and_store_pdf_path for uploads."""
+    tmp_path = await asyncio.to_thread(_write_temp_pdf, file_bytes)
     try:
-        # Generate file hash for duplicate detection
-        file_hash = generate_file_hash(file_bytes)
-        logger.info(f"Generated file hash: {file_hash[:12]}...")
-        
-        # Write PDF bytes to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(file_bytes)
-            tmp_path = tmp.name
-            logger.info(f"Created temporary file: {tmp_path}")
-
-        # Load and split the PDF
-        loader = PyPDFLoader(tmp_path)
-        documents = loader.load()
-        
-        if not documents:
-            logger.warning(f"No documents extracted from PDF: {filename}")
-            return 0
-            
-        logger.info(f"Extracted {len(documents)} pages from PDF: {filename}")
+        return await process_and_store_pdf_path(
+            tmp_path, filename, generate_file_hash(file_bytes), len(file_bytes), vectorstore, progress
+        )
+    finally:
+        remove_temp_file(tmp_path)
 
-        # Add filename and file hash to metadata
-        for doc in documents:
-            doc.metadata['source_filename'] = filename
-            doc.metadata['file_hash'] = file_hash
+async def process_and_store_pdf_path(
+    path: str,
+    filename: str,
+    file_hash: str,
+    size_bytes: int,
+    vectorstore: PGVector,
+    progress: Optional[ProgressCallback] = None,
+    store_batch_size: int = INGEST_STORE_BATCH_SIZE
+) -> int:
+    """Ingest a PDF on disk page range by page range.
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=512,
-            chunk_overlap=50,
+    Each range of INGEST_PAGE_BATCH_SIZE pages is parsed and split in the
+    process pool, then embedded and inserted with COPY in batches of at
+    most `store_batch_size` chunks, so memory stays bounded by the batch
+    sizes rather than the document size. The next range is parsed while
+    the current one is embedded.
+
+    The file hash is claimed in the catalog first, so concurrent uploads of
+    the same file raise DocumentExistsError instead of ingesting it twice.
+    """
+    global _ingest_semaphore
+    
+    if _ingest_semaphore is None:
+        _ingest_semaphore = asyncio.Semaphore(INGEST_MAX_CONCURRENCY)
+    
+    # Reject the upload instead of letting an unbounded backlog build up
+    if _ingest_semaphore.locked() and _ingest_waiting >= INGEST_MAX_QUEUE_DEPTH:
+        raise IngestQueueFullError(
+            f"Ingestion queue is full ({INGEST_MAX_QUEUE_DEPTH} uploads waiting)"
         )
-        splits = text_splitter.split_documents(documents)
+    
+    if not await claim_document(file_hash, filename, size_bytes):
+        raise DocumentExistsError(f"Document '{filename}' has already been uploaded")
+    
+    chunk_count = 0
+    try:
+        chunk_count = await _store_pdf_path(
+            path, filename, file_hash, size_bytes, vectorstore, progress, store_batch_size
+        )
+        return chunk_count
+    finally:
+        # Free the hash for a retry unless the document made it into the catalog
+        if chunk_count == 0:
+            await release_document_claim(file_hash)
+
+async def _store_pdf_path(
+    path: str,
+    filename: str,
+    file_hash: str,
+    size_bytes: int,
+    vectorstore: PGVector,
+    progress: Optional[ProgressCallback],
+    store_batch_size: int
+) -> int:
+    global _ingest_waiting, _ingest_in_progress
+    
+    _ingest_waiting += 1
+    try:
+        await _ingest_semaphore.acquire()
+    finally:
+        _ingest_waiting -= 1
+    _ingest_in_progress += 1
+    
+    next_range = None
+    
+    try:
+        # Parse in the process pool to keep the event loop free
+        loop = asyncio.get_running_loop()
+        executor = get_ingest_executor()
+        page_count = await _parsed(loop.run_in_executor(executor, count_pdf_pages, path), filename)
         
-        if not splits:
-            logger.warning(f"No text chunks created from PDF: {filename}")
+        if page_count == 0:
+            logger.warning(f"No pages found in PDF: {filename}")
             return 0
-            
-        logger.info(f"Created {len(splits)} chunks from PDF: {filename}")
-
-        # Store the chunks in the vectorstore
+        
+        logger.info(f"Ingesting {page_count} pages from PDF: {filename}")
+        
+        page_ranges = [
+            (start, min(start + INGEST_PAGE_BATCH_SIZE, page_count))
+            for start in range(0, page_count, INGEST_PAGE_BATCH_SIZE)
+        ]
+        
+        def parse_range(index: int) -> asyncio.Future:
+            start, stop = page_ranges[index]
+            return loop.run_in_executor(
+                executor, parse_and_split_pages, path, filename, file_hash, start, stop
+            )
+        
+        # Embed and store the chunks in batches so progress can be reported
+        stored_ids = []
+        recorded = False
+        chunks_total = 0
+        stage_seconds = {"parse": 0.0, "split": 0.0, "embed": 0.0, "insert": 0.0}
         try:
-            await vectorstore.aadd_documents(splits)
-            logger.info(f"Successfully stored {len(splits)} chunks in vectorstore")
+            next_range = parse_range(0)
+            for index, (start, stop) in enumerate(page_ranges):
+                splits, timings = await _parsed(next_range, filename)
+                next_range = parse_range(index + 1) if index + 1 < len(page_ranges) else None
+                for stage, seconds in timings.items():
+                    stage_seconds[stage] += seconds
+                
+                chunks_total += len(splits)
+                if progress:
+                    await progress(pages_parsed=stop, chunks_total=chunks_total)
+                
+                for batch_start in range(0, len(splits), store_batch_size):
+                    batch = splits[batch_start:batch_start + store_batch_size]
+                    texts = [doc.page_content for doc in batch]
+                    batch_started = time.perf_counter()
+                    embeddings = await embed_documents_cached(texts, vectorstore.embeddings)
+                    stage_seconds["embed"] += time.perf_counter() - batch_started
+                    if progress:
+                        await progress(chunks_embedded=len(stored_ids) + len(batch))
+                    
+                    batch_started = time.perf_counter()
+                    stored_ids.extend(await copy_embeddings(
+                        texts, embeddings, [doc.metadata for doc in batch]
+                    ))
+                    stage_seconds["insert"] += time.perf_counter() - batch_started
+                    if progress:
+                        await progress(chunks_stored=len(stored_ids))
+            
+            for stage, seconds in stage_seconds.items():
+                INGEST_STAGE_SECONDS.observe(seconds, stage=stage)
+            if not stored_ids:
+                logger.warning(f"No text chunks created from PDF: {filename}")
+                return 0
+            logger.info(f"Successfully stored {len(stored_ids)} chunks from {page_count} pages in vectorstore")
+            bump_corpus_version()
+            
+            await record_document(file_hash, filename, page_count, len(stored_ids), size_bytes)
+            recorded = True
+        except PdfParseError:
+            raise
         except Exception as e:
             logger.error(f"Failed to store chunks in vectorstore: {str(e)}")
             raise Exception(f"Database storage failed: {str(e)}")
+        finally:
+            # Don't leave a partially ingested document behind, also when the
+            # ingestion is cancelled (shutdown, Ctrl-C in the bulk CLI)
+            if stored_ids and not recorded:
+                try:
+                    await vectorstore.adelete(ids=stored_ids)
+                    bump_corpus_version()
+                except Exception as e:
+                    # claim_document removes them on the next attempt
+                    logger.error(f"Failed to remove {len(stored_ids)} partial chunks of {filename}: {str(e)}")
         
-        return len(splits)
+        return len(stored_ids)
     
     except Exception as e:
         logger.error(f"Error processing PDF {filename}: {str(e)}")
         raise
     
     finally:
-        # Clean up the temporary file
-        if tmp_path and os.path.exists(tmp_path):
-            try:
-                os.unlink(tmp_path)
-                logger.debug(f"Cleaned up temporary file: {tmp_path}")
-            except Exception as e:
-                logger.warning(f"Failed to delete temporary file {tmp_path}: {str(e)}")
+        if next_range is not None:
+            next_range.cancel()
+        _ingest_in_progress -= 1
+        _ingest_semaphore.release()
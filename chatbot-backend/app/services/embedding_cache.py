@@ -0,0 +1,108 @@
+import hashlib
+import logging
+import os
+from typing import Dict, List
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.connection import get_ingest_engine
+from app.db.models import EmbeddingCacheEntry
+from app.db.vectorstore import EMBEDDING_MODEL_NAME
+from app.services.cache import LRUCache
+from app.metrics import CACHE_REQUESTS
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_LRU_SIZE = int(os.getenv("EMBEDDING_CACHE_LRU_SIZE", "10000"))
+
+_lru = LRUCache(EMBEDDING_CACHE_LRU_SIZE, name="chunk_embeddings")
+_db_hits = 0
+_db_misses = 0
+
+def get_async_session() -> AsyncSession:
+    """Get async database session."""
+    engine = get_ingest_engine()
+    return AsyncSession(engine)
+
+def chunk_content_hash(text: str, model_name: str = EMBEDDING_MODEL_NAME) -> str:
+    """Hash a chunk's text together with the model that embeds it."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+async def embed_documents_cached(texts: List[str], embeddings: Embeddings) -> List[List[float]]:
+    """Embed chunk texts, reusing embeddings of identical chunks seen before.
+
+    Lookups go to the in-process LRU first, then to the `embedding_cache`
+    table in one batched query. Only the remaining misses are embedded, and
+    their vectors are written back to the table.
+    """
+    global _db_hits, _db_misses
+
+    if not EMBEDDING_CACHE_ENABLED:
+        return await embeddings.aembed_documents(texts)
+
+    hashes = [chunk_content_hash(text) for text in texts]
+    found: Dict[str, List[float]] = {}
+
+    for content_hash in set(hashes):
+        vector = _lru.get(content_hash)
+        if vector is not None:
+            found[content_hash] = vector
+
+    lookup = [content_hash for content_hash in set(hashes) if content_hash not in found]
+    if lookup:
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(EmbeddingCacheEntry.content_hash, EmbeddingCacheEntry.embedding)
+                .where(EmbeddingCacheEntry.content_hash.in_(lookup))
+            )
+            rows = result.all()
+        for content_hash, vector in rows:
+            found[content_hash] = [float(value) for value in vector]
+            _lru.set(content_hash, found[content_hash])
+        _db_hits += len(rows)
+        CACHE_REQUESTS.inc(len(rows), cache="chunk_embeddings_db", result="hit")
+
+    # Embed each distinct missing text once
+    missing: Dict[str, str] = {}
+    for content_hash, text in zip(hashes, texts):
+        if content_hash not in found:
+            missing.setdefault(content_hash, text)
+    _db_misses += len(missing)
+    CACHE_REQUESTS.inc(len(missing), cache="chunk_embeddings_db", result="miss")
+
+    if missing:
+        vectors = await embeddings.aembed_documents(list(missing.values()))
+        async with get_async_session() as session:
+            stmt = insert(EmbeddingCacheEntry).values([
+                {
+                    "content_hash": content_hash,
+                    "model_name": EMBEDDING_MODEL_NAME,
+                    "embedding": vector
+                }
+                for content_hash, vector in zip(missing.keys(), vectors)
+            ])
+            await session.execute(stmt.on_conflict_do_nothing(index_elements=["content_hash"]))
+            await session.commit()
+        for content_hash, vector in zip(missing.keys(), vectors):
+            found[content_hash] = vector
+            _lru.set(content_hash, vector)
+
+    logger.info(
+        f"Embedding cache: {len(texts) - len(missing)} of {len(texts)} chunks reused, "
+        f"{len(missing)} embedded"
+    )
+    return [found[content_hash] for content_hash in hashes]
+
+def get_embedding_cache_stats() -> dict:
+    """Get chunk embedding cache statistics."""
+    return {
+        "enabled": EMBEDDING_CACHE_ENABLED,
+        "lru": _lru.stats(),
+        "db_hits": _db_hits,
+        "db_misses": _db_misses
+    }
@@ -0,0 +1,271 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from langchain_core.embeddings import Embeddings
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Embedding service configuration. Every torch call already spreads over
+# EMBED_TORCH_THREADS cores, so the pool and the per-call thread count are
+# sized together to add up to the machine rather than multiply past it
+EMBED_MAX_WORKERS = int(os.getenv("EMBED_MAX_WORKERS", "2"))
+EMBED_TORCH_THREADS = int(os.getenv(
+    "EMBED_TORCH_THREADS", str(max(1, (os.cpu_count() or 1) // max(1, EMBED_MAX_WORKERS)))
+))
+EMBED_QUERY_BATCH_WINDOW_MS = float(os.getenv("EMBED_QUERY_BATCH_WINDOW_MS", "5"))
+EMBED_QUERY_MAX_BATCH_SIZE = int(os.getenv("EMBED_QUERY_MAX_BATCH_SIZE", "32"))
+EMBED_INGEST_BATCH_SIZE = int(os.getenv("EMBED_INGEST_BATCH_SIZE", "128"))
+
+# Lower value runs first
+QUERY_PRIORITY = 0
+INGEST_PRIORITY = 1
+
+class _PriorityGate:
+    """Limit concurrent batches, handing free slots to the highest priority waiter."""
+
+    def __init__(self, slots: int):
+        self._free = slots
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    async def acquire(self, priority: int) -> None:
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Pass on a slot that was handed to us after we were cancelled
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._free += 1
+
+class _BatchStats:
+    """Per-mode batch throughput counters."""
+
+    def __init__(self):
+        self.batches = 0
+        self.texts = 0
+        self.seconds = 0.0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+
+    def record(self, size: int, seconds: float) -> None:
+        self.batches += 1
+        self.texts += size
+        self.seconds += seconds
+        self.last_batch_size = size
+        self.last_batch_seconds = seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": round(self.texts / self.batches, 2) if self.batches else 0,
+            "texts_per_second": round(self.texts / self.seconds, 2) if self.seconds else 0,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_texts_per_second": (
+                round(self.last_batch_size / self.last_batch_seconds, 2)
+                if self.last_batch_seconds else 0
+            )
+        }
+
+class EmbeddingService(Embeddings):
+    """Embeddings wrapper that batches work onto a dedicated thread pool.
+
+    Concurrent query embeddings arriving within a short window are coalesced
+    into a single forward pass. Document embeddings for ingestion are split
+    into large batches that only get a pool slot when no query is waiting,
+    and never occupy every slot at once.
+    """
+
+    def __init__(
+        self,
+        model: Embeddings,
+        max_workers: int = EMBED_MAX_WORKERS,
+        query_batch_window_ms: float = EMBED_QUERY_BATCH_WINDOW_MS,
+        query_max_batch_size: int = EMBED_QUERY_MAX_BATCH_SIZE,
+        ingest_batch_size: int = EMBED_INGEST_BATCH_SIZE
+    ):
+        if max_workers < 2:
+            raise ValueError(
+                f"EMBED_MAX_WORKERS must be at least 2 so queries always have a slot ingestion can't take, got {max_workers}"
+            )
+        self.model = model
+        self.max_workers = max_workers
+        self.query_batch_window = query_batch_window_ms / 1000
+        self.query_max_batch_size = query_max_batch_size
+        self.ingest_batch_size = ingest_batch_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="embedding"
+        )
+        self._gate = _PriorityGate(self.max_workers)
+        self._ingest_slots = self.max_workers - 1
+        self._ingest_semaphore: Optional[asyncio.Semaphore] = None
+        self._pending_queries: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Keep references so running query batches aren't garbage collected
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self._stats: Dict[str, _BatchStats] = {
+            "query": _BatchStats(),
+            "ingest": _BatchStats()
+        }
+
+    # Synchronous calls bypass batching and run inline
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_queries.append((text, future))
+
+        if len(self._pending_queries) >= self.query_max_batch_size:
+            self._flush_queries()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.query_batch_window, self._flush_queries)
+
+        return await future
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self._ingest_semaphore is None:
+            self._ingest_semaphore = asyncio.Semaphore(self._ingest_slots)
+
+        async def embed_batch(batch: List[str]) -> List[List[float]]:
+            async with self._ingest_semaphore:
+                return await self._run_batch(
+                    "ingest", INGEST_PRIORITY, self.model.embed_documents, batch
+                )
+
+        batches = [
+            texts[start:start + self.ingest_batch_size]
+            for start in range(0, len(texts), self.ingest_batch_size)
+        ]
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def _flush_queries(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch = self._pending_queries
+        self._pending_queries = []
+        if batch:
+            task = asyncio.ensure_future(self._embed_query_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _embed_query_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            # HuggingFaceEmbeddings encodes queries and documents the same way
+            # unless query_encode_kwargs is set, so one document pass serves all
+            vectors = await self._run_batch(
+                "query", QUERY_PRIORITY, self.model.embed_documents, texts
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    async def _run_batch(
+        self,
+        mode: str,
+        priority: int,
+        fn: Callable[[List[str]], List[List[float]]],
+        texts: List[str]
+    ) -> List[List[float]]:
+        await self._gate.acquire(priority)
+        try:
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            vectors = await loop.run_in_executor(self._executor, fn, texts)
+            elapsed = time.perf_counter() - started
+            self._stats[mode].record(len(texts), elapsed)
+            logger.debug(f"Embedded {mode} batch of {len(texts)} texts in {elapsed * 1000:.1f}ms")
+            return vectors
+        finally:
+            self._gate.release()
+
+    def get_metrics(self) -> dict:
+        """Get per-mode batch throughput statistics."""
+        return {
+            "max_workers": self.max_workers,
+            "pending_queries": len(self._pending_queries),
+            **{mode: stats.to_dict() for mode, stats in self._stats.items()}
+        }
+
+    def shutdown(self) -> None:
+        """Cancel queued and running query batches and stop the thread pool."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for _, future in self._pending_queries:
+            future.cancel()
+        self._pending_queries = []
+        for task in self._batch_tasks:
+            task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def limit_torch_threads(threads: int = EMBED_TORCH_THREADS) -> None:
+    """Cap the threads each torch call uses; shared by embeddings and reranking."""
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+@lru_cache()
+def get_embedding_service() -> EmbeddingService:
+    from app.db.vectorstore import get_embeddings
+
+    limit_torch_threads()
+    service = EmbeddingService(get_embeddings())
+    logger.info(
+        f"Initialized embedding service with max_workers={service.max_workers}, "
+        f"torch_threads={EMBED_TORCH_THREADS}, "
+        f"query_batch_window_ms={EMBED_QUERY_BATCH_WINDOW_MS}, "
+        f"ingest_batch_size={EMBED_INGEST_BATCH_SIZE}"
+    )
+    return service
+
+def get_embedding_metrics() -> dict:
+    """Get embedding service statistics without forcing the model to load."""
+    if not get_embedding_service.cache_info().currsize:
+        return {}
+    return get_embedding_service().get_metrics()
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import timedelta
+from typing import Dict, List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func
+from app.db.models import IngestionJob, JobStatus
+from app.db.connection import get_ingest_engine
+from app.services.embedder import (
+    process_and_store_pdf_path, remove_temp_file, IngestQueueFullError, INGEST_MAX_QUEUE_DEPTH
+)
+
+logger = logging.getLogger(__name__)
+
+INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "2"))
+# Every process bumps updated_at of the jobs it holds at this interval; queued
+# or running jobs not touched for INGEST_JOB_STALE_SECONDS belonged to a
+# process that died and are failed by whichever process notices first
+INGEST_JOB_HEARTBEAT_SECONDS = float(os.getenv("INGEST_JOB_HEARTBEAT_SECONDS", "30"))
+INGEST_JOB_STALE_SECONDS = int(os.getenv("INGEST_JOB_STALE_SECONDS", "300"))
+
+_job_queue: Optional[asyncio.Queue] = None
+_workers: List[asyncio.Task] = []
+_heartbeat_task: Optional[asyncio.Task] = None
+# Jobs queued or running in this process
+_active_jobs: Set[str] = set()
+
+def get_async_session() -> AsyncSession:
+    """Get async database session."""
+    engine = get_ingest_engine()
+    return AsyncSession(engine)
+
+def _job_to_dict(job: IngestionJob) -> Dict:
+    return {
+        "job_id": job.id,
+        "filename": job.filename,
+        "file_hash": job.file_hash,
+        "status": job.status.value,
+        "pages_parsed": job.pages_parsed,
+        "chunks_total": job.chunks_total,
+        "chunks_embedded": job.chunks_embedded,
+        "chunks_stored": job.chunks_stored,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "updated_at": job.updated_at.isoformat()
+    }
+
+async def create_job(filename: str, file_hash: str) -> str:
+    """Create a queued ingestion job and return its ID."""
+    job_id = str(uuid.uuid4())
+
+    async with get_async_session() as session:
+        job = IngestionJob(
+            id=job_id,
+            filename=filename[:255],
+            file_hash=file_hash,
+            status=JobStatus.QUEUED,
+            pages_parsed=0,
+            chunks_total=0,
+            chunks_embedded=0,
+            chunks_stored=0
+        )
+        session.add(job)
+        await session.commit()
+
+    logger.info(f"Created ingestion job {job_id} for {filename}")
+    return job_id
+
+async def update_job(job_id: str, **values) -> None:
+    """Update fields of an ingestion job."""
+    async with get_async_session() as session:
+        await session.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id == job_id)
+            .values(**values)
+        )
+        await session.commit()
+
+async def get_job(job_id: str) -> Optional[Dict]:
+    """Get an ingestion job by ID."""
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(IngestionJob).where(IngestionJob.id == job_id)
+        )
+        job = result.scalar_one_or_none()
+        return _job_to_dict(job) if job else None
+
+async def get_active_job_for_hash(file_hash: str) -> Optional[Dict]:
+    """Get a queued or running job for a file hash, if there is one."""
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(IngestionJob)
+            .where(IngestionJob.file_hash == file_hash)
+            .where(IngestionJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+            .limit(1)
+        )
+        job = result.scalar_one_or_none()
+        return _job_to_dict(job) if job else None
+
+async def enqueue_job(job_id: str, path: str, filename: str, file_hash: str, size_bytes: int) -> None:
+    """Hand a spooled upload to the background ingestion workers.
+
+    The job takes ownership of the file at `path` and deletes it when done.
+    """
+    if _job_queue is None:
+        raise RuntimeError("Ingestion job workers are not running")
+    try:
+        _job_queue.put_nowait((job_id, path, filename, file_hash, size_bytes))
+        _active_jobs.add(job_id)
+    except asyncio.QueueFull:
+        raise IngestQueueFullError(
+            f"Ingestion queue is full ({INGEST_MAX_QUEUE_DEPTH} jobs waiting)"
+        )
+
+async def _run_job(job_id: str, path: str, filename: str, file_hash: str, size_bytes: int) -> None:
+    from app.db.vectorstore import get_vectorstore
+
+    await update_job(job_id, status=JobStatus.RUNNING)
+
+    async def report_progress(**counters) -> None:
+        await update_job(job_id, **counters)
+
+    try:
+        vectorstore = await get_vectorstore()
+        chunk_count = await process_and_store_pdf_path(
+            path, filename, file_hash, size_bytes, vectorstore, progress=report_progress
+        )
+        await update_job(job_id, status=JobStatus.COMPLETED)
+        logger.info(f"Ingestion job {job_id} completed with {chunk_count} chunks")
+    except Exception as e:
+        logger.error(f"Ingestion job {job_id} failed: {str(e)}")
+        await update_job(job_id, status=JobStatus.FAILED, error=str(e))
+    finally:
+        _active_jobs.discard(job_id)
+        remove_temp_file(path)
+
+async def _worker(worker_id: int) -> None:
+    while True:
+        job_id, path, filename, file_hash, size_bytes = await _job_queue.get()
+        try:
+            await _run_job(job_id, path, filename, file_hash, size_bytes)
+        except Exception as e:
+            logger.error(f"Ingestion worker {worker_id} failed on job {job_id}: {str(e)}")
+        finally:
+            _job_queue.task_done()
+
+async def fail_stale_jobs() -> None:
+    """Fail queued or running jobs whose process stopped sending heartbeats.
+
+    Queued uploads only live in the memory of the process that accepted
+    them, so they are lost when it dies. Jobs held by live processes,
+    including other workers of the same deployment, are left alone.
+    """
+    async with get_async_session() as session:
+        result = await session.execute(
+            update(IngestionJob)
+            .where(IngestionJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+            .where(IngestionJob.updated_at < func.now() - timedelta(seconds=INGEST_JOB_STALE_SECONDS))
+            .values(status=JobStatus.FAILED, error="Interrupted by server restart")
+        )
+        await session.commit()
+    if result.rowcount:
+        logger.warning(f"Marked {result.rowcount} interrupted ingestion jobs as failed")
+
+async def _heartbeat() -> None:
+    while True:
+        try:
+            if _active_jobs:
+                async with get_async_session() as session:
+                    await session.execute(
+                        update(IngestionJob)
+                        .where(IngestionJob.id.in_(list(_active_jobs)))
+                        .where(IngestionJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+                        .values(updated_at=func.now())
+                    )
+                    await session.commit()
+            await fail_stale_jobs()
+        except Exception as e:
+            logger.warning(f"Ingestion job heartbeat failed: {str(e)}")
+        await asyncio.sleep(INGEST_JOB_HEARTBEAT_SECONDS)
+
+async def start_job_workers() -> None:
+    """Start the background ingestion workers and the job heartbeat."""
+    global _job_queue, _heartbeat_task
+
+    _job_queue = asyncio.Queue(maxsize=INGEST_MAX_QUEUE_DEPTH)
+    for worker_id in range(INGEST_JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker(worker_id)))
+    # The first beat also fails jobs left behind by a crashed process
+    _heartbeat_task = asyncio.create_task(_heartbeat())
+    logger.info(f"Started {INGEST_JOB_WORKERS} ingestion job workers")
+
+async def stop_job_workers() -> None:
+    """Cancel the background ingestion workers and the job heartbeat."""
+    global _heartbeat_task
+
+    tasks = _workers + ([_heartbeat_task] if _heartbeat_task is not None else [])
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _workers.clear()
+    _heartbeat_task = None
+
+def get_job_queue_status() -> dict:
+    """Get background job queue statistics."""
+    return {
+        "workers": len(_workers),
+        "queued": _job_queue.qsize() if _job_queue is not None else 0
+    }
@@ -1,35 +1,110 @@
+import asyncio
 import logging
 import os
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional
 from functools import lru_cache
 from langchain_ollama import ChatOllama
 from langchain.schema import HumanMessage, SystemMessage
 from langchain_postgres import PGVector
+from app.db.vector_search import vector_search, lexical_search
+from app.metrics import PROMPT_STAGE_SECONDS, CHUNKS_RETRIEVED
+from app.services.ollama_client import (
+    OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_KEEP_ALIVE, OLLAMA_NUM_CTX, parse_keep_alive, get_ollama_client_kwargs
+)
+from app.services.retrieval_cache import (
+    get_query_embedding, retrieval_cache_key, get_cached_results, set_cached_results
+)
 from dotenv import load_dotenv
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-async def search_documents(query: str, vectorstore: PGVector, k: int = 10, similarity_threshold: float = 0.7) -> List[Dict[str, Any]]:
+RAG_RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "vector").lower()
+RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+
+def reciprocal_rank_fusion(*ranked_lists: List[Dict[str, Any]], rrf_k: int = RRF_K) -> List[Dict[str, Any]]:
+    """Merge ranked result lists by summing 1 / (rrf_k + rank) per chunk."""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for ranked in ranked_lists:
+        for rank, result in enumerate(ranked, start=1):
+            entry = fused.setdefault(result["id"], {**result, "rrf_score": 0.0})
+            entry["rrf_score"] += 1.0 / (rrf_k + rank)
+    return sorted(fused.values(), key=lambda x: x["rrf_score"], reverse=True)
+
+async def search_documents(
+    query: str,
+    vectorstore: PGVector,
+    k: int = 10,
+    similarity_threshold: float = 0.7,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    retrieval_mode: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    retrieval_mode = (retrieval_mode or RAG_RETRIEVAL_MODE).lower()
+    if retrieval_mode not in ("vector", "hybrid"):
+        raise ValueError(f"Unsupported retrieval mode: {retrieval_mode}")
+    
     try:
-        # Get more documents with similarity scores
-        results_with_scores = await vectorstore.asimilarity_search_with_relevance_scores(query, k=k)
+        started = time.perf_counter()
+        embedding = await get_query_embedding(query, vectorstore.embeddings)
+        embedded = time.perf_counter()
+        PROMPT_STAGE_SECONDS.observe(embedded - started, stage="query_embedding")
+        
+        cache_key = retrieval_cache_key(embedding, k, similarity_threshold, ef_search, probes, retrieval_mode)
+        cached_results = get_cached_results(cache_key)
+        if cached_results is not None:
+            logger.info(f"Retrieval cache hit with {len(cached_results)} results for query: {query[:50]}...")
+            CHUNKS_RETRIEVED.inc(len(cached_results), phase="retrieved")
+            return cached_results
+        
+        if retrieval_mode == "hybrid":
+            # Run the dense and lexical queries concurrently and fuse their rankings
+            vector_results, lexical_results = await asyncio.gather(
+                vector_search(embedding, k, ef_search=ef_search, probes=probes),
+                lexical_search(query, embedding, k)
+            )
+            searched = time.perf_counter()
+            lexical_ids = {result["id"] for result in lexical_results}
+            candidates = reciprocal_rank_fusion(vector_results, lexical_results)
+        else:
+            # Get more documents with similarity scores through the ANN index
+            vector_results = await vector_search(embedding, k, ef_search=ef_search, probes=probes)
+            searched = time.perf_counter()
+            lexical_results, lexical_ids = [], set()
+            candidates = vector_results
         
         search_results = []
-        for doc, score in results_with_scores:
-            # Only include documents above the similarity threshold
-            if score >= similarity_threshold:
+        for result in candidates:
+            # Cosine distance to relevance score, as PGVector does
+            score = 1.0 - result["distance"]
+            # Only include documents above the similarity threshold, but keep
+            # exact lexical matches such as part numbers regardless
+            if score >= similarity_threshold or result["id"] in lexical_ids:
                 search_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "source_filename": doc.metadata.get("source_filename", "Unknown"),
+                    "id": result["id"],
+                    "content": result["content"],
+                    "metadata": result["metadata"],
+                    "source_filename": result["metadata"].get("source_filename", "Unknown"),
                     "similarity_score": score
                 })
         
-        # Sort by similarity score in descending order
-        search_results.sort(key=lambda x: x["similarity_score"], reverse=True)
+        # Hybrid results are already in fused order; vector results are
+        # sorted by similarity score in descending order
+        if retrieval_mode == "vector":
+            search_results.sort(key=lambda x: x["similarity_score"], reverse=True)
+        search_results = search_results[:k]
+        set_cached_results(cache_key, search_results)
+        PROMPT_STAGE_SECONDS.observe(searched - embedded, stage="vector_search")
+        CHUNKS_RETRIEVED.inc(len(search_results), phase="retrieved")
         
+        logger.info(
+            f"Retrieval timings ({retrieval_mode}): embed={(embedded - started) * 1000:.1f}ms "
+            f"search={(searched - embedded) * 1000:.1f}ms "
+            f"fuse={(time.perf_counter() - searched) * 1000:.1f}ms "
+            f"(vector={len(vector_results)}, lexical={len(lexical_results)})"
+        )
         logger.info(f"Found {len(search_results)} results above threshold {similarity_threshold} for query: {query[:50]}...")
         return search_results
         
@@ -40,19 +115,21 @@ async def search_documents(query: str, vectorstore: PGVector, k: int = 10, simil
 @lru_cache()
 def get_chat_model() -> ChatOllama:
     try:
-        # Get configuration from environment variables
-        host = os.getenv("OLLAMA_HOST", "localhost")
-        port = os.getenv("OLLAMA_PORT", "11434")
-        model = os.getenv("OLLAMA_MODEL", "deepseek-r1")
         temperature = float(os.getenv("OLLAMA_TEMPERATURE", "0.7"))
-        base_url = f"http://{host}:{port}"
         
+        # One cached instance, so every request shares its pooled HTTP client
         chat_model = ChatOllama(
-            model=model,
+            model=OLLAMA_MODEL,
             temperature=temperature,
-            base_url=base_url
+            num_ctx=OLLAMA_NUM_CTX,
+            base_url=OLLAMA_BASE_URL,
+            keep_alive=parse_keep_alive(OLLAMA_KEEP_ALIVE),
+            client_kwargs=get_ollama_client_kwargs()
+        )
+        logger.info(
+            f"Initialized Ollama chat model: {OLLAMA_MODEL} at {OLLAMA_BASE_URL} "
+            f"(temperature={temperature}, num_ctx={OLLAMA_NUM_CTX}, keep_alive={OLLAMA_KEEP_ALIVE})"
         )
-        logger.info(f"Initialized Ollama chat model: {model} at {base_url} (temperature={temperature})")
         return chat_model
     except Exception as e:
         logger.error(f"Failed to initialize Ollama chat model: {str(e)}")
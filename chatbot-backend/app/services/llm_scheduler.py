@@ -0,0 +1,200 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Tuple
+from app.metrics import Counter, Gauge, Histogram
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Generations allowed to run against Ollama at the same time
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+# Requests allowed to wait for a slot before new ones are rejected
+LLM_MAX_QUEUE_DEPTH = int(os.getenv("LLM_MAX_QUEUE_DEPTH", "32"))
+LLM_MAX_QUEUE_WAIT_SECONDS = float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "30"))
+
+# Lower values are served first; requests of equal priority are served FIFO
+PRIORITIES = {"interactive": 0, "background": 10}
+
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "llm_queue_wait_seconds",
+    "Time spent waiting for an LLM generation slot.",
+    labelnames=("priority",)
+)
+LLM_REJECTIONS = Counter(
+    "llm_rejections_total",
+    "LLM requests rejected because the queue was full or the wait timed out.",
+    labelnames=("reason",)
+)
+LLM_CANCELLATIONS = Counter(
+    "llm_cancellations_total",
+    "LLM requests cancelled because the client disconnected."
+)
+
+class LLMQueueFullError(Exception):
+    """Raised when too many requests are already waiting for an LLM slot."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LLMQueueTimeoutError(Exception):
+    """Raised when a request waited longer than allowed for an LLM slot."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class LLMSlot:
+    """A held generation slot. Releasing it more than once is a no-op."""
+
+    def __init__(self, scheduler: "LLMScheduler"):
+        self._scheduler = scheduler
+        self._started = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._scheduler._release(time.perf_counter() - self._started)
+
+class LLMScheduler:
+    """Admission control for LLM generations.
+
+    At most `max_concurrency` slots are held at once. Further requests wait
+    in a priority queue (FIFO within a priority) for up to `max_wait_seconds`;
+    when `max_queue_depth` requests are already waiting, new ones are
+    rejected immediately. A freed slot is handed straight to the next waiter.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue_depth: int, max_wait_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+        self.active = 0
+        self.queued = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # Moving average of how long a slot is held, used for Retry-After
+        self._average_hold_seconds: Optional[float] = None
+
+    def retry_after(self) -> int:
+        """Estimate in seconds until the current backlog has drained."""
+        average = self._average_hold_seconds or 10.0
+        return max(1, math.ceil(average * (self.queued + 1) / self.max_concurrency))
+
+    async def acquire(self, priority: str = "interactive") -> LLMSlot:
+        """Wait for a generation slot.
+
+        Raises LLMQueueFullError when the queue is full and
+        LLMQueueTimeoutError when no slot frees up within the maximum wait.
+        """
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            LLM_QUEUE_WAIT_SECONDS.observe(0.0, priority=priority)
+            return LLMSlot(self)
+
+        if self.queued >= self.max_queue_depth:
+            LLM_REJECTIONS.inc(reason="queue_full")
+            raise LLMQueueFullError(
+                f"LLM queue is full ({self.max_queue_depth} requests waiting)", self.retry_after()
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES[priority], next(self._sequence), future))
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.max_wait_seconds)
+        except asyncio.CancelledError:
+            if not self._leave_queue(future):
+                self._release(None)
+            raise
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the wait ended
+            if self._leave_queue(future):
+                LLM_REJECTIONS.inc(reason="timeout")
+                raise LLMQueueTimeoutError(
+                    f"No LLM slot became available within {self.max_wait_seconds:g}s", self.retry_after()
+                )
+        finally:
+            LLM_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - started, priority=priority)
+        return LLMSlot(self)
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive") -> AsyncIterator[None]:
+        """Hold a generation slot for the duration of the block."""
+        held = await self.acquire(priority)
+        try:
+            yield
+        finally:
+            held.release()
+
+    def _leave_queue(self, future: asyncio.Future) -> bool:
+        """Give up waiting. Returns False if the slot was already handed over."""
+        if future.done() and not future.cancelled():
+            return False
+        future.cancel()
+        self.queued -= 1
+        return True
+
+    def _release(self, hold_seconds: Optional[float]) -> None:
+        if hold_seconds is not None:
+            if self._average_hold_seconds is None:
+                self._average_hold_seconds = hold_seconds
+            else:
+                self._average_hold_seconds = 0.8 * self._average_hold_seconds + 0.2 * hold_seconds
+
+        # Waiters that timed out or were cancelled stay in the heap until popped
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.queued -= 1
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def status(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue_depth": self.max_queue_depth,
+            "max_wait_seconds": self.max_wait_seconds,
+            "active": self.active,
+            "queued": self.queued,
+            "average_generation_seconds": (
+                round(self._average_hold_seconds, 3) if self._average_hold_seconds is not None else None
+            ),
+            "rejected_queue_full": int(LLM_REJECTIONS.value(reason="queue_full")),
+            "rejected_timeout": int(LLM_REJECTIONS.value(reason="timeout")),
+            "cancelled": int(LLM_CANCELLATIONS.value())
+        }
+
+@lru_cache()
+def get_llm_scheduler() -> LLMScheduler:
+    logger.info(
+        f"Initialized LLM scheduler (max_concurrency={LLM_MAX_CONCURRENCY}, "
+        f"max_queue_depth={LLM_MAX_QUEUE_DEPTH}, max_wait={LLM_MAX_QUEUE_WAIT_SECONDS}s)"
+    )
+    return LLMScheduler(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE_DEPTH, LLM_MAX_QUEUE_WAIT_SECONDS)
+
+def _scheduler_state() -> dict:
+    if not get_llm_scheduler.cache_info().currsize:
+        return {}
+    scheduler = get_llm_scheduler()
+    return {("active",): scheduler.active, ("queued",): scheduler.queued}
+
+LLM_SCHEDULER_REQUESTS = Gauge(
+    "llm_scheduler_requests",
+    "LLM requests holding a slot (active) or waiting for one (queued).",
+    labelnames=("state",),
+    callback=_scheduler_state
+)
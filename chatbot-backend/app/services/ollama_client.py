@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+from functools import lru_cache
+from typing import Optional
+import httpx
+from ollama import AsyncClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "localhost")
+OLLAMA_PORT = os.getenv("OLLAMA_PORT", "11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "deepseek-r1")
+OLLAMA_BASE_URL = f"http://{OLLAMA_HOST}:{OLLAMA_PORT}"
+# Context window requested from Ollama; its own default is much smaller and
+# silently truncates longer prompts
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+# How long Ollama keeps the model loaded after a request (duration string or seconds, -1 = forever)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# HTTP connection pool shared by all requests to Ollama
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "10"))
+OLLAMA_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY_SECONDS", "60"))
+OLLAMA_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_CONNECT_TIMEOUT_SECONDS", "5"))
+OLLAMA_WARMUP_ENABLED = os.getenv("OLLAMA_WARMUP_ENABLED", "true").lower() == "true"
+# Upper bound per warm-up step, since requests to Ollama have no read timeout
+OLLAMA_WARMUP_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_WARMUP_TIMEOUT_SECONDS", "120"))
+# Seconds between keep-warm pings of the chat and embedding models; 0 disables them
+MODEL_KEEP_WARM_INTERVAL_SECONDS = float(os.getenv("MODEL_KEEP_WARM_INTERVAL_SECONDS", "300"))
+
+_keep_warm_task: Optional[asyncio.Task] = None
+
+def parse_keep_alive(value: str):
+    """Pass plain numbers to Ollama as seconds and anything else ("30m") as a duration."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+def get_ollama_client_kwargs() -> dict:
+    """Settings for the pooled httpx client behind every Ollama client."""
+    return {
+        "limits": httpx.Limits(
+            max_connections=OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+            keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        # Generations can legitimately run for minutes, so only connecting is bounded
+        "timeout": httpx.Timeout(None, connect=OLLAMA_CONNECT_TIMEOUT_SECONDS)
+    }
+
+@lru_cache()
+def get_ollama_client() -> AsyncClient:
+    """Async client for model management calls (load, keep-warm)."""
+    return AsyncClient(host=OLLAMA_BASE_URL, **get_ollama_client_kwargs())
+
+async def load_chat_model() -> None:
+    """Ask Ollama to load the chat model and keep it resident for OLLAMA_KEEP_ALIVE.
+
+    A generate request with an empty prompt loads the model without
+    generating anything. It asks for the same context window as chat
+    requests, otherwise the first question would reload the model.
+    """
+    await get_ollama_client().generate(
+        model=OLLAMA_MODEL, prompt="", keep_alive=parse_keep_alive(OLLAMA_KEEP_ALIVE),
+        options={"num_ctx": OLLAMA_NUM_CTX}
+    )
+
+async def warm_up_models() -> None:
+    """Load the chat model and run the embedding model once.
+
+    Failures and steps taking longer than OLLAMA_WARMUP_TIMEOUT_SECONDS are
+    logged rather than raised, so the app still starts when Ollama is
+    unreachable or unresponsive; the first question then pays the load.
+    """
+    from app.services.embedding_service import get_embedding_service
+
+    try:
+        await asyncio.wait_for(load_chat_model(), OLLAMA_WARMUP_TIMEOUT_SECONDS)
+        logger.info(f"Loaded Ollama model {OLLAMA_MODEL} (keep_alive={OLLAMA_KEEP_ALIVE})")
+    except asyncio.TimeoutError:
+        logger.warning(f"Ollama did not load {OLLAMA_MODEL} within {OLLAMA_WARMUP_TIMEOUT_SECONDS:g}s")
+    except Exception as e:
+        logger.warning(f"Could not warm up Ollama model {OLLAMA_MODEL}: {str(e)}")
+
+    try:
+        await asyncio.wait_for(get_embedding_service().aembed_query("warm up"), OLLAMA_WARMUP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"Embedding model warm-up did not finish within {OLLAMA_WARMUP_TIMEOUT_SECONDS:g}s")
+    except Exception as e:
+        logger.warning(f"Could not warm up embedding model: {str(e)}")
+
+async def _keep_warm() -> None:
+    while True:
+        await asyncio.sleep(MODEL_KEEP_WARM_INTERVAL_SECONDS)
+        await warm_up_models()
+
+def start_keep_warm() -> None:
+    """Ping the chat and embedding models periodically so they never go cold."""
+    global _keep_warm_task
+
+    if MODEL_KEEP_WARM_INTERVAL_SECONDS <= 0 or _keep_warm_task is not None:
+        return
+    _keep_warm_task = asyncio.create_task(_keep_warm())
+    logger.info(f"Started model keep-warm every {MODEL_KEEP_WARM_INTERVAL_SECONDS:g}s")
+
+async def stop_keep_warm() -> None:
+    """Stop the keep-warm task and close the model management client."""
+    global _keep_warm_task
+
+    if _keep_warm_task is not None:
+        _keep_warm_task.cancel()
+        await asyncio.gather(_keep_warm_task, return_exceptions=True)
+        _keep_warm_task = None
+    if get_ollama_client.cache_info().currsize:
+        await get_ollama_client().close()
+        get_ollama_client.cache_clear()
@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import Any, Dict, List
+from app.services.cache import LRUCache
+from app.services.embedding_service import limit_torch_threads
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "5"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+
+_scores = LRUCache(RERANK_CACHE_SIZE, name="rerank_scores")
+
+@lru_cache()
+def get_cross_encoder():
+    try:
+        from sentence_transformers import CrossEncoder
+
+        # Runs alongside embedding batches, so stay within the same thread budget
+        limit_torch_threads()
+        model = CrossEncoder(RERANK_MODEL, device="cpu")
+        logger.info(f"Initialized cross-encoder: {RERANK_MODEL}")
+        return model
+    except Exception as e:
+        logger.error(f"Failed to initialize cross-encoder: {str(e)}")
+        raise Exception(f"Cross-encoder initialization failed: {str(e)}")
+
+def _question_hash(question: str) -> str:
+    normalized = " ".join(question.lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+async def rerank(question: str, chunks: List[Dict[str, Any]], top_n: int = RERANK_TOP_N) -> List[Dict[str, Any]]:
+    """Reorder chunks by cross-encoder relevance and keep the best top_n.
+
+    All uncached (question, chunk) pairs are scored in one batched call on
+    CPU. Scores are cached by (question hash, chunk id).
+    """
+    if not chunks:
+        return []
+
+    started = time.perf_counter()
+    question_hash = _question_hash(question)
+    scores: Dict[str, float] = {}
+    to_score = []
+    for chunk in chunks:
+        score = _scores.get((question_hash, chunk["id"]))
+        if score is None:
+            to_score.append(chunk)
+        else:
+            scores[chunk["id"]] = score
+
+    if to_score:
+        model = get_cross_encoder()
+        pairs = [(question, chunk["content"]) for chunk in to_score]
+        predicted = await asyncio.to_thread(model.predict, pairs, batch_size=len(pairs))
+        for chunk, score in zip(to_score, predicted):
+            scores[chunk["id"]] = float(score)
+            _scores.set((question_hash, chunk["id"]), float(score))
+
+    reranked = [{**chunk, "rerank_score": scores[chunk["id"]]} for chunk in chunks]
+    reranked.sort(key=lambda x: x["rerank_score"], reverse=True)
+
+    logger.info(
+        f"Reranked {len(chunks)} chunks ({len(to_score)} scored, {len(chunks) - len(to_score)} cached) "
+        f"in {(time.perf_counter() - started) * 1000:.1f}ms, keeping {min(top_n, len(chunks))}"
+    )
+    return reranked[:top_n]
+
+def get_rerank_cache_stats() -> dict:
+    """Get rerank score cache statistics."""
+    return {
+        "enabled": RERANK_ENABLED,
+        "scores": _scores.stats()
+    }
@@ -0,0 +1,78 @@
+import hashlib
+import logging
+import os
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from app.services.cache import LRUCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+RETRIEVAL_CACHE_EMBEDDING_SIZE = int(os.getenv("RETRIEVAL_CACHE_EMBEDDING_SIZE", "1024"))
+RETRIEVAL_CACHE_RESULT_SIZE = int(os.getenv("RETRIEVAL_CACHE_RESULT_SIZE", "1024"))
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "300"))
+
+_query_embeddings = LRUCache(RETRIEVAL_CACHE_EMBEDDING_SIZE, name="query_embeddings")
+_results = LRUCache(RETRIEVAL_CACHE_RESULT_SIZE, ttl_seconds=RETRIEVAL_CACHE_TTL_SECONDS, name="retrieval_results")
+
+# Bumped whenever documents are added or removed. This is per process, so
+# with several workers the TTL bounds how long another worker can serve
+# results from before a change.
+_corpus_version = 0
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+def get_corpus_version() -> int:
+    return _corpus_version
+
+def bump_corpus_version() -> int:
+    """Invalidate cached retrieval results after the corpus has changed."""
+    global _corpus_version
+    _corpus_version += 1
+    _results.clear()
+    logger.info(f"Corpus version bumped to {_corpus_version}")
+    return _corpus_version
+
+async def get_query_embedding(question: str, embeddings: Embeddings) -> List[float]:
+    """Embed a question, memoizing by its normalized text."""
+    if not RETRIEVAL_CACHE_ENABLED:
+        return await embeddings.aembed_query(question)
+
+    key = normalize_question(question)
+    embedding = _query_embeddings.get(key)
+    if embedding is None:
+        embedding = await embeddings.aembed_query(question)
+        _query_embeddings.set(key, embedding)
+    return embedding
+
+def retrieval_cache_key(embedding: List[float], *params: Any) -> Tuple:
+    """Build a result cache key from the query embedding, search params and corpus version."""
+    digest = hashlib.sha1(array("f", embedding).tobytes()).hexdigest()
+    return (digest, *params, _corpus_version)
+
+def get_cached_results(key: Tuple) -> Optional[List[Dict[str, Any]]]:
+    if not RETRIEVAL_CACHE_ENABLED:
+        return None
+    results = _results.get(key)
+    if results is None:
+        return None
+    # Hand out copies so callers can't mutate the cached entries
+    return [dict(result) for result in results]
+
+def set_cached_results(key: Tuple, results: List[Dict[str, Any]]) -> None:
+    if RETRIEVAL_CACHE_ENABLED:
+        _results.set(key, [dict(result) for result in results])
+
+def get_retrieval_cache_stats() -> dict:
+    """Get retrieval cache statistics."""
+    return {
+        "enabled": RETRIEVAL_CACHE_ENABLED,
+        "corpus_version": _corpus_version,
+        "query_embeddings": _query_embeddings.stats(),
+        "results": _results.stats()
+    }
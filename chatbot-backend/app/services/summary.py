@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import os
+import re
+from typing import Dict, List, Set
+from langchain.schema import HumanMessage, SystemMessage
+from app.services.conversation import (
+    get_conversation_history, get_conversation_summary, update_conversation_summary
+)
+from app.services.llm import get_chat_model
+from app.services.llm_scheduler import get_llm_scheduler
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Most recent messages sent verbatim with every prompt
+CONVERSATION_HISTORY_WINDOW = int(os.getenv("CONVERSATION_HISTORY_WINDOW", "10"))
+# Turns (question + answer) between summary refreshes
+CONVERSATION_SUMMARY_EVERY_TURNS = int(os.getenv("CONVERSATION_SUMMARY_EVERY_TURNS", "3"))
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+Update the existing summary with the new messages. Keep facts, names, numbers, decisions and open questions
+that later answers may depend on. Reply with the updated summary only, in at most 200 words."""
+
+_refreshing: Set[str] = set()
+_tasks: Set[asyncio.Task] = set()
+
+def _strip_reasoning(text: str) -> str:
+    # Reasoning models such as deepseek-r1 prefix their answer with a think block
+    return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+
+def _format_messages(messages: List[Dict]) -> str:
+    return "\n".join(
+        f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
+        for msg in messages
+    )
+
+async def refresh_conversation_summary(conversation_id: str) -> bool:
+    """Fold older messages into the conversation's rolling summary.
+
+    Runs once the messages not yet summarized fill the history window, and
+    folds all but the newest (window - 2 * CONVERSATION_SUMMARY_EVERY_TURNS)
+    of them, so the verbatim history sent with prompts never exceeds the
+    window and a refresh happens every CONVERSATION_SUMMARY_EVERY_TURNS turns.
+    Returns whether the summary was updated.
+    """
+    summary, summarized_until_id = await get_conversation_summary(conversation_id)
+    pending = await get_conversation_history(
+        conversation_id, limit=None, after_id=summarized_until_id
+    )
+    if len(pending) < CONVERSATION_HISTORY_WINDOW:
+        return False
+
+    # The summary covers every message up to summarized_until_id, so fold by
+    # id as well; created_at order can differ when turns overlap
+    pending.sort(key=lambda message: message["id"])
+    keep = max(0, CONVERSATION_HISTORY_WINDOW - 2 * CONVERSATION_SUMMARY_EVERY_TURNS)
+    to_fold = pending[:len(pending) - keep]
+
+    # Background work yields the LLM to waiting interactive questions
+    async with get_llm_scheduler().slot("background"):
+        response = await get_chat_model().ainvoke([
+            SystemMessage(content=SUMMARY_PROMPT),
+            HumanMessage(content=(
+                f"Existing summary:\n{summary or '(none)'}\n\n"
+                f"New messages:\n{_format_messages(to_fold)}"
+            ))
+        ])
+    new_summary = _strip_reasoning(response.content)
+
+    await update_conversation_summary(conversation_id, new_summary, to_fold[-1]["id"])
+    logger.info(f"Folded {len(to_fold)} messages into summary of conversation {conversation_id}")
+    return True
+
+def schedule_summary_refresh(conversation_id: str, unsummarized_messages: int) -> None:
+    """Refresh a conversation's summary in the background, at most once at a time.
+
+    `unsummarized_messages` is how many messages are not in the summary yet,
+    as known from the history loaded for the prompt plus the saved turn.
+    Nothing is read from the database until they fill the history window.
+    """
+    if unsummarized_messages < CONVERSATION_HISTORY_WINDOW or conversation_id in _refreshing:
+        return
+    _refreshing.add(conversation_id)
+
+    async def run() -> None:
+        try:
+            await refresh_conversation_summary(conversation_id)
+        except Exception as e:
+            logger.error(f"Failed to refresh summary of conversation {conversation_id}: {str(e)}")
+        finally:
+            _refreshing.discard(conversation_id)
+
+    # Keep a reference so the task isn't garbage collected mid-flight
+    task = asyncio.create_task(run())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
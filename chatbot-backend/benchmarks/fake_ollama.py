@@ -0,0 +1,95 @@
+"""A stand-in for the Ollama HTTP API with a controllable generation speed.
+
+Implements just enough of the API for ChatOllama: `/api/chat` (streamed
+NDJSON or a single JSON response), `/api/generate` for load/keep-alive
+requests, and `/api/tags`. Each answer waits `--ttft-ms` before the first
+token and then emits `--answer-tokens` tokens at `--tokens-per-second`.
+
+Usage:
+    python -m benchmarks.fake_ollama --port 11535 --ttft-ms 150 --tokens-per-second 60
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+def create_app(ttft_ms: float, tokens_per_second: float, answer_tokens: int) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+
+    def chunk(model: str, content: str, done: bool, **extra) -> dict:
+        return {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+            **extra
+        }
+
+    def final_stats(started: float) -> dict:
+        return {
+            "done_reason": "stop",
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "prompt_eval_count": 0,
+            "eval_count": answer_tokens
+        }
+
+    async def generate_tokens():
+        await asyncio.sleep(ttft_ms / 1000)
+        for index in range(answer_tokens):
+            if index:
+                await asyncio.sleep(1 / tokens_per_second)
+            yield f"token{index} "
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        started = time.perf_counter()
+
+        if not body.get("stream", True):
+            content = "".join([token async for token in generate_tokens()])
+            return JSONResponse(chunk(model, content, True, **final_stats(started)))
+
+        async def stream():
+            async for token in generate_tokens():
+                yield json.dumps(chunk(model, token, False)) + "\n"
+            yield json.dumps(chunk(model, "", True, **final_stats(started))) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        # Only model load / keep-alive requests (empty prompt) are expected here
+        body = await request.json()
+        return JSONResponse({
+            "model": body.get("model", "fake"),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": "",
+            "done": True,
+            "done_reason": "load"
+        })
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": "fake", "model": "fake"}]}
+
+    return app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11535)
+    parser.add_argument("--ttft-ms", type=float, default=150, help="Delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60)
+    parser.add_argument("--answer-tokens", type=int, default=64, help="Tokens per answer")
+    args = parser.parse_args()
+
+    app = create_app(args.ttft_ms, args.tokens_per_second, args.answer_tokens)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""End-to-end benchmark of ingestion, retrieval and `/api/prompt`.
+
+Runs offline against the Postgres database configured in the environment
+(pgvector, migrated with `alembic upgrade head`). Ollama is replaced by
+`benchmarks.fake_ollama` with a configurable time to first token and token
+rate, and embeddings default to a deterministic fake model, so the numbers
+reflect this service rather than model speed. Pass `--embeddings configured`
+to use the real embeddings model instead.
+
+Steps:
+  1. Generate a synthetic PDF corpus and ingest it (pages/s, chunks/s).
+  2. Run retrieval queries directly (p50/p95/p99 latency).
+  3. Send `/api/prompt` requests at each concurrency level (requests/s and
+     latency percentiles). The app runs in-process behind an ASGI transport.
+
+The benchmark documents and conversations are deleted afterwards unless
+`--keep-data` is given. Results can be written as JSON to compare commits.
+
+Usage:
+    python -m benchmarks.load_test --documents 20 --pages 10 \\
+        --concurrency 1 4 16 --requests 64 --ttft-ms 150 --tokens-per-second 60 \\
+        --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import httpx
+import numpy as np
+from benchmarks.synthetic_corpus import generate_corpus, random_query
+
+def percentile(values: List[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else 0.0
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    return {
+        "latency_ms_p50": percentile(latencies_ms, 50),
+        "latency_ms_p95": percentile(latencies_ms, 95),
+        "latency_ms_p99": percentile(latencies_ms, 99),
+        "latency_ms_mean": float(np.mean(latencies_ms)) if latencies_ms else 0.0
+    }
+
+def git_revision() -> Dict[str, Optional[str]]:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], text=True).strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_fake_ollama(port: int, ttft_ms: float, tokens_per_second: float, answer_tokens: int) -> subprocess.Popen:
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(port),
+        "--ttft-ms", str(ttft_ms), "--tokens-per-second", str(tokens_per_second),
+        "--answer-tokens", str(answer_tokens)
+    ])
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Fake Ollama server exited during startup")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/tags", timeout=1).raise_for_status()
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Fake Ollama server did not start within 30s")
+
+async def benchmark_ingest(corpus_dir: str, paths: List[str], workers: int, batch_size: int) -> Dict:
+    from app.ingest import run as run_ingest
+    from app.services.catalog import delete_documents
+    from app.services.embedder import generate_file_hash_from_path
+
+    # Start from a clean slate so every file is actually ingested
+    file_hashes = [generate_file_hash_from_path(path) for path in paths]
+    await delete_documents(file_hashes)
+
+    checkpoint_path = os.path.join(corpus_dir, "checkpoint.jsonl")
+    summary = await run_ingest(corpus_dir, workers, batch_size, checkpoint_path)
+    return {"file_hashes": file_hashes, **summary}
+
+async def benchmark_retrieval(queries: List[str], k: int) -> Dict:
+    from app.db.vectorstore import get_vectorstore
+    from app.services.llm import search_documents
+
+    vectorstore = await get_vectorstore()
+    await search_documents(queries[0], vectorstore, k=k, similarity_threshold=0.0)
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        await search_documents(query, vectorstore, k=k, similarity_threshold=0.0)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {"queries": len(queries), "k": k, **latency_summary(latencies)}
+
+async def benchmark_prompt(client: httpx.AsyncClient, queries: List[str], concurrency: int, requests: int) -> Dict:
+    latencies, errors, conversation_ids = [], 0, []
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for index in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/prompt", json={"question": queries[index % len(queries)]})
+                response.raise_for_status()
+                conversation_ids.append(response.json()["conversation_id"])
+                latencies.append((time.perf_counter() - started) * 1000)
+            except httpx.HTTPError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        **latency_summary(latencies),
+        "conversation_ids": conversation_ids
+    }
+
+async def delete_conversations(conversation_ids: List[str]) -> None:
+    from sqlalchemy import delete
+    from app.db.models import Conversation
+    from app.services.conversation import get_async_session
+
+    async with get_async_session() as session:
+        await session.execute(delete(Conversation).where(Conversation.id.in_(conversation_ids)))
+        await session.commit()
+
+async def run(args: argparse.Namespace, corpus_dir: str) -> Dict:
+    from app.main import app
+    from app.services.catalog import delete_documents
+
+    paths = generate_corpus(corpus_dir, args.documents, args.pages, args.seed)
+    rng = random.Random(args.seed)
+    queries = [random_query(rng) for _ in range(max(args.queries, args.requests))]
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        ingest = await benchmark_ingest(corpus_dir, paths, args.workers, args.batch_size)
+        file_hashes = ingest.pop("file_hashes")
+        results["ingest"] = ingest
+        conversation_ids = []
+        try:
+            results["retrieval"] = await benchmark_retrieval(queries[:args.queries], args.k)
+
+            results["prompt"] = []
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+                for concurrency in args.concurrency:
+                    run_result = await benchmark_prompt(client, queries, concurrency, args.requests)
+                    conversation_ids.extend(run_result.pop("conversation_ids"))
+                    results["prompt"].append(run_result)
+        finally:
+            if not args.keep_data:
+                await delete_documents(file_hashes)
+                if conversation_ids:
+                    await delete_conversations(conversation_ids)
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, retrieval and /api/prompt end to end")
+    parser.add_argument("--documents", type=int, default=20, help="Synthetic PDFs to generate")
+    parser.add_argument("--pages", type=int, default=10, help="Pages per synthetic PDF")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=2, help="Files ingested concurrently")
+    parser.add_argument("--batch-size", type=int, default=1024, help="Chunks embedded and inserted per batch")
+    parser.add_argument("--queries", type=int, default=200, help="Retrieval queries to time")
+    parser.add_argument("--k", type=int, default=10, help="Chunks retrieved per query")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=64, help="/api/prompt requests per concurrency level")
+    parser.add_argument("--ttft-ms", type=float, default=150, help="Fake LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60, help="Fake LLM token rate")
+    parser.add_argument("--answer-tokens", type=int, default=64, help="Fake LLM tokens per answer")
+    parser.add_argument(
+        "--embeddings", choices=["fake", "configured"], default="fake",
+        help="Use deterministic fake embeddings, or the model configured in the environment"
+    )
+    parser.add_argument("--keep-data", action="store_true", help="Keep the benchmark documents and conversations")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    # Settings are read at import time, so they must be in place before the app is imported
+    port = free_port()
+    os.environ.update({
+        "OLLAMA_HOST": "127.0.0.1",
+        "OLLAMA_PORT": str(port),
+        # Caches would turn the repeated synthetic queries into lookups
+        "RETRIEVAL_CACHE_ENABLED": "false",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "EMBEDDING_CACHE_ENABLED": "false"
+    })
+    if args.embeddings == "fake":
+        os.environ["EMBEDDING_PROVIDER"] = "fake"
+
+    ollama = start_fake_ollama(port, args.ttft_ms, args.tokens_per_second, args.answer_tokens)
+    try:
+        with tempfile.TemporaryDirectory(prefix="rag-benchmark-") as corpus_dir:
+            results = asyncio.run(run(args, corpus_dir))
+    finally:
+        ollama.terminate()
+        ollama.wait()
+
+    from app.db.vectorstore import EMBEDDING_MODEL_NAME
+
+    report = {
+        **git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {**vars(args), "embedding_model": EMBEDDING_MODEL_NAME},
+        **results
+    }
+
+    ingest, retrieval = report["ingest"], report["retrieval"]
+    print(f"Commit: {report['commit']}{' (dirty)' if report['dirty'] else ''}")
+    print(
+        f"Ingest: {ingest['ingested']} files, {ingest['pages']} pages ({ingest['pages_per_second']} pages/s), "
+        f"{ingest['chunks']} chunks ({ingest['chunks_per_second']} chunks/s)"
+    )
+    print(
+        f"Retrieval ({retrieval['queries']} queries, k={retrieval['k']}): "
+        f"p50 {retrieval['latency_ms_p50']:.1f}ms, p95 {retrieval['latency_ms_p95']:.1f}ms, "
+        f"p99 {retrieval['latency_ms_p99']:.1f}ms"
+    )
+    print(f"{'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for run_result in report["prompt"]:
+        print(
+            f"{run_result['concurrency']:>11} {run_result['requests_per_second']:>8.2f} "
+            f"{run_result['latency_ms_p50']:>8.1f} {run_result['latency_ms_p95']:>8.1f} "
+            f"{run_result['latency_ms_p99']:>8.1f} {run_result['errors']:>6}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote results to {args.output}")
+
+if __name__ == "__main__":
+    main()
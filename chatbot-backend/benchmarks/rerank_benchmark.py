@@ -0,0 +1,117 @@
+"""Benchmark the cross-encoder rerank stage against bi-encoder ranking.
+
+Runs fully offline on CPU. The dataset is a JSONL file with one labelled
+question per line:
+
+    {"question": "...", "passages": ["...", "..."], "relevant": [0, 3]}
+
+`relevant` holds indices into `passages`. For every candidate count, the
+passages are first ranked by the bi-encoder (the same embeddings model the
+app uses), truncated to that many candidates, and then reranked. The report
+shows per-question rerank latency and recall@N / MRR for both orderings.
+
+Usage:
+    python -m benchmarks.rerank_benchmark --dataset eval.jsonl \\
+        --candidates 10 20 50 --top-n 5 --output rerank.json
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List
+import numpy as np
+from app.db.vectorstore import get_embeddings
+from app.services.reranker import get_cross_encoder, RERANK_MODEL
+
+def load_dataset(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def recall_at(ranking: List[int], relevant: set, n: int) -> float:
+    return len(set(ranking[:n]) & relevant) / len(relevant) if relevant else 0.0
+
+def reciprocal_rank(ranking: List[int], relevant: set) -> float:
+    for position, index in enumerate(ranking, start=1):
+        if index in relevant:
+            return 1.0 / position
+    return 0.0
+
+def percentile(values: List[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else 0.0
+
+def run(dataset: List[Dict], candidate_counts: List[int], top_n: int) -> Dict:
+    embeddings = get_embeddings()
+    cross_encoder = get_cross_encoder()
+
+    # Warm both models so the first question doesn't carry load time
+    embeddings.embed_query("warm up")
+    cross_encoder.predict([("warm up", "warm up")])
+
+    bi_encoder_rankings = []
+    for item in dataset:
+        query_vector = np.array(embeddings.embed_query(item["question"]))
+        passage_vectors = np.array(embeddings.embed_documents(item["passages"]))
+        similarities = passage_vectors @ query_vector / (
+            np.linalg.norm(passage_vectors, axis=1) * np.linalg.norm(query_vector)
+        )
+        bi_encoder_rankings.append([int(i) for i in np.argsort(-similarities)])
+
+    results = {"model": RERANK_MODEL, "questions": len(dataset), "top_n": top_n, "runs": []}
+    for candidates in candidate_counts:
+        latencies, bi_recall, bi_mrr, ce_recall, ce_mrr = [], [], [], [], []
+        for item, ranking in zip(dataset, bi_encoder_rankings):
+            relevant = set(item["relevant"])
+            pool = ranking[:candidates]
+
+            started = time.perf_counter()
+            scores = cross_encoder.predict(
+                [(item["question"], item["passages"][i]) for i in pool],
+                batch_size=len(pool)
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            reranked = [pool[i] for i in np.argsort(-np.asarray(scores))]
+
+            bi_recall.append(recall_at(ranking, relevant, top_n))
+            bi_mrr.append(reciprocal_rank(ranking[:top_n], relevant))
+            ce_recall.append(recall_at(reranked, relevant, top_n))
+            ce_mrr.append(reciprocal_rank(reranked[:top_n], relevant))
+
+        results["runs"].append({
+            "candidates": candidates,
+            "latency_ms_p50": percentile(latencies, 50),
+            "latency_ms_p95": percentile(latencies, 95),
+            "latency_ms_mean": statistics.fmean(latencies),
+            f"bi_encoder_recall@{top_n}": statistics.fmean(bi_recall),
+            f"bi_encoder_mrr@{top_n}": statistics.fmean(bi_mrr),
+            f"rerank_recall@{top_n}": statistics.fmean(ce_recall),
+            f"rerank_mrr@{top_n}": statistics.fmean(ce_mrr)
+        })
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark cross-encoder reranking")
+    parser.add_argument("--dataset", required=True, help="JSONL file with labelled questions")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(load_dataset(args.dataset), args.candidates, args.top_n)
+
+    print(f"Model: {results['model']} ({results['questions']} questions, top_n={args.top_n})")
+    print(f"{'candidates':>10} {'p50 ms':>8} {'p95 ms':>8} {'bi R@N':>8} {'rr R@N':>8} {'bi MRR':>8} {'rr MRR':>8}")
+    for run_result in results["runs"]:
+        print(
+            f"{run_result['candidates']:>10} "
+            f"{run_result['latency_ms_p50']:>8.1f} {run_result['latency_ms_p95']:>8.1f} "
+            f"{run_result[f'bi_encoder_recall@{args.top_n}']:>8.3f} {run_result[f'rerank_recall@{args.top_n}']:>8.3f} "
+            f"{run_result[f'bi_encoder_mrr@{args.top_n}']:>8.3f} {run_result[f'rerank_mrr@{args.top_n}']:>8.3f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results to {args.output}")
+
+if __name__ == "__main__":
+    main()
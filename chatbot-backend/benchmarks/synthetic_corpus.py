@@ -0,0 +1,111 @@
+"""Generate a deterministic corpus of text PDFs for benchmarks.
+
+The PDFs are written directly (uncompressed content streams, Helvetica), so
+no PDF library is needed. Text is drawn from a fixed vocabulary with a
+seeded RNG, which keeps runs with the same arguments byte-identical.
+
+Usage:
+    python -m benchmarks.synthetic_corpus ./corpus --documents 50 --pages 20
+"""
+import argparse
+import os
+import random
+from typing import List
+
+VOCABULARY = (
+    "account adapter antenna archive backup bandwidth battery bearing cable calibration "
+    "capacitor certificate channel circuit client cluster compressor configuration connector "
+    "controller coolant current cylinder database diagnostic diode display driver encoder "
+    "engine failover fault filter firmware flange frequency fuse gasket gateway gear "
+    "generator hydraulic impeller inverter invoice latency license lubricant manifold "
+    "memory module monitor motor network nozzle operator overload packet partition "
+    "password payment piston policy pressure protocol pump quota register relay replica "
+    "resistor rotor router schedule sensor server shaft signal solenoid spindle storage "
+    "subscription switch temperature terminal thermostat throttle timeout token torque "
+    "transformer turbine valve voltage warranty"
+).split()
+
+LINES_PER_PAGE = 45
+CHARS_PER_LINE = 90
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages: List[List[str]]) -> bytes:
+    """Build a minimal PDF with one page per list of text lines."""
+    page_count = len(pages)
+    font_id = 3 + 2 * page_count
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * index} 0 R" for index in range(page_count)), page_count
+        )
+    ]
+    for index, lines in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * index} 0 R >>"
+        )
+        text = " T* ".join(f"({_escape(line)}) Tj" for line in lines)
+        stream = f"BT /F1 10 Tf 12 TL 40 760 Td {text} ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode("latin-1")
+    output += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode("latin-1")
+    return bytes(output)
+
+def random_sentence(rng: random.Random) -> str:
+    words = rng.choices(VOCABULARY, k=rng.randint(6, 16))
+    return " ".join(words).capitalize() + "."
+
+def random_page(rng: random.Random, document: int, page: int) -> List[str]:
+    lines, line = [f"Document {document} page {page}"], ""
+    while len(lines) < LINES_PER_PAGE:
+        sentence = random_sentence(rng)
+        if len(line) + len(sentence) + 1 > CHARS_PER_LINE:
+            lines.append(line)
+            line = sentence
+        else:
+            line = f"{line} {sentence}".strip()
+    return lines
+
+def random_query(rng: random.Random) -> str:
+    return " ".join(rng.choices(VOCABULARY, k=rng.randint(3, 6)))
+
+def generate_corpus(directory: str, documents: int, pages: int, seed: int = 42) -> List[str]:
+    """Write `documents` PDFs of `pages` pages each and return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for document in range(documents):
+        path = os.path.join(directory, f"synthetic-{seed}-{document:05d}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_pdf([random_page(rng, document, page) for page in range(pages)]))
+        paths.append(path)
+    return paths
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic PDF corpus")
+    parser.add_argument("directory")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.directory, args.documents, args.pages, args.seed)
+    print(f"Wrote {len(paths)} PDFs with {args.pages} pages each to {args.directory}")
+
+if __name__ == "__main__":
+    main()
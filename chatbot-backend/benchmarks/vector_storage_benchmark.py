@@ -0,0 +1,198 @@
+"""Compare ANN index size, latency and recall across vector storage modes.
+
+Runs against the Postgres database configured in the environment (pgvector
+>= 0.7) on a scratch table, so the live index is never touched. Vectors are
+copied from the stored document chunks (`--source corpus`) or generated as
+clustered random vectors (`--source synthetic`). Queries are perturbed copies
+of stored vectors; the exact top-k from a sequential scan is the ground truth.
+
+For each storage mode the index is built, its size recorded, and every query
+run the way app.db.vector_search runs it: over-fetch k * rescore factor
+candidates from the index, then rescore them by exact cosine distance.
+
+Usage:
+    python -m benchmarks.vector_storage_benchmark --source synthetic --rows 100000 \\
+        --modes full halfvec binary --rescore-factors 1 2 4 8 --k 10 --output storage.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from io import BytesIO
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import text
+from app.db.connection import get_ingest_engine
+from app.db.vector_index import (
+    EMBEDDING_DIMENSION, VECTOR_INDEX_TYPE, VECTOR_STORAGE_MODES, HNSW_EF_SEARCH,
+    create_vector_index_sql, index_distance_sql, search_settings
+)
+from app.db.vector_search import to_vector_literal
+
+TABLE_NAME = "vector_storage_benchmark"
+INDEX_NAME = f"idx_{TABLE_NAME}_embedding"
+
+def percentile(values: List[float], pct: float) -> float:
+    return float(np.percentile(values, pct)) if values else 0.0
+
+def synthetic_vectors(rows: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors scattered around random cluster centres, like topical text embeddings."""
+    centres = rng.standard_normal((clusters, EMBEDDING_DIMENSION))
+    vectors = centres[rng.integers(0, clusters, rows)] + 0.5 * rng.standard_normal((rows, EMBEDDING_DIMENSION))
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+async def load_vectors(conn, source: str, rows: int, clusters: int, rng: np.random.Generator) -> int:
+    await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE_NAME}"))
+    await conn.execute(text(
+        f"CREATE TABLE {TABLE_NAME} (id bigserial PRIMARY KEY, embedding vector({EMBEDDING_DIMENSION}) NOT NULL)"
+    ))
+
+    if source == "corpus":
+        await conn.execute(text(f"""
+            INSERT INTO {TABLE_NAME} (embedding)
+            SELECT embedding FROM langchain_pg_embedding ORDER BY random() LIMIT :rows
+        """), {"rows": rows})
+    else:
+        buffer = BytesIO()
+        for vector in synthetic_vectors(rows, clusters, rng):
+            buffer.write(f'"{to_vector_literal(vector)}"\n'.encode())
+        buffer.seek(0)
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_to_table(
+            TABLE_NAME, source=buffer, columns=["embedding"], format="csv"
+        )
+
+    await conn.execute(text(f"ANALYZE {TABLE_NAME}"))
+    return (await conn.execute(text(f"SELECT count(*) FROM {TABLE_NAME}"))).scalar()
+
+async def sample_queries(conn, count: int, noise: float, rng: np.random.Generator) -> List[List[float]]:
+    result = await conn.execute(text(
+        f"SELECT embedding::text FROM {TABLE_NAME} ORDER BY random() LIMIT :count"
+    ), {"count": count})
+    queries = []
+    for (literal,) in result.all():
+        vector = np.array(json.loads(literal)) + noise * rng.standard_normal(EMBEDDING_DIMENSION)
+        queries.append((vector / np.linalg.norm(vector)).tolist())
+    return queries
+
+async def exact_neighbours(conn, queries: List[List[float]], k: int) -> List[set]:
+    """Ground truth from a sequential scan, before any index exists."""
+    truth = []
+    for query in queries:
+        result = await conn.execute(text(f"""
+            SELECT id FROM {TABLE_NAME}
+            ORDER BY embedding <=> CAST(:embedding AS vector)
+            LIMIT :k
+        """), {"embedding": to_vector_literal(query), "k": k})
+        truth.append({row.id for row in result.all()})
+    return truth
+
+async def run_queries(conn, mode: str, queries: List[List[float]], truth: List[set], k: int, factor: int) -> Dict:
+    candidates = k * factor
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        # One transaction per query, like app.db.vector_search
+        for name, value in search_settings(candidates, HNSW_EF_SEARCH).items():
+            await conn.execute(text("SELECT set_config(:name, :value, true)"), {"name": name, "value": str(value)})
+        result = await conn.execute(text(f"""
+            SELECT c.id FROM (
+                SELECT e.id, e.embedding FROM {TABLE_NAME} e
+                ORDER BY {index_distance_sql(mode)}
+                LIMIT :candidates
+            ) c
+            ORDER BY c.embedding <=> CAST(:embedding AS vector)
+            LIMIT :k
+        """), {"embedding": to_vector_literal(query), "candidates": candidates, "k": k})
+        found = {row.id for row in result.all()}
+        await conn.commit()
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(found & expected) / len(expected) if expected else 0.0)
+    return {
+        "rescore_factor": factor,
+        "candidates": candidates,
+        "latency_ms_p50": percentile(latencies, 50),
+        "latency_ms_p95": percentile(latencies, 95),
+        "latency_ms_p99": percentile(latencies, 99),
+        f"recall@{k}": statistics.fmean(recalls)
+    }
+
+async def run(args: argparse.Namespace) -> Dict:
+    rng = np.random.default_rng(args.seed)
+    engine = get_ingest_engine()
+    results = {"index_type": VECTOR_INDEX_TYPE, "dimension": EMBEDDING_DIMENSION, "k": args.k, "modes": []}
+
+    async with engine.connect() as conn:
+        results["rows"] = await load_vectors(conn, args.source, args.rows, args.clusters, rng)
+        results["table_bytes"] = (await conn.execute(text(f"SELECT pg_table_size('{TABLE_NAME}')"))).scalar()
+        queries = await sample_queries(conn, args.queries, args.noise, rng)
+        truth = await exact_neighbours(conn, queries, args.k)
+        await conn.commit()
+
+        try:
+            for mode in args.modes:
+                started = time.perf_counter()
+                await conn.execute(text(create_vector_index_sql(INDEX_NAME, storage_mode=mode, table=TABLE_NAME)))
+                await conn.commit()
+                build_seconds = time.perf_counter() - started
+                index_bytes = (await conn.execute(text(f"SELECT pg_relation_size('{INDEX_NAME}')"))).scalar()
+
+                # Exact rescoring only adds work for full-precision indexes
+                factors = [1] if mode == "full" else args.rescore_factors
+                runs = []
+                for factor in factors:
+                    runs.append(await run_queries(conn, mode, queries, truth, args.k, factor))
+                results["modes"].append({
+                    "mode": mode,
+                    "index_bytes": index_bytes,
+                    "build_seconds": build_seconds,
+                    "runs": runs
+                })
+
+                await conn.execute(text(f"DROP INDEX {INDEX_NAME}"))
+                await conn.commit()
+        finally:
+            if not args.keep_table:
+                await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE_NAME}"))
+                await conn.commit()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark full, halfvec and binary-quantized vector indexes")
+    parser.add_argument("--source", choices=["corpus", "synthetic"], default="synthetic")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--clusters", type=int, default=200, help="Cluster centres for synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.05, help="Perturbation added to sampled query vectors")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", choices=VECTOR_STORAGE_MODES, default=list(VECTOR_STORAGE_MODES))
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep-table", action="store_true", help="Keep the scratch table afterwards")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(
+        f"{results['rows']} vectors of dimension {results['dimension']} "
+        f"({results['table_bytes'] / 2**20:.1f} MiB table), {VECTOR_INDEX_TYPE} index, k={args.k}"
+    )
+    print(f"{'mode':>8} {'index MiB':>10} {'build s':>8} {'factor':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'recall':>7}")
+    for mode_result in results["modes"]:
+        for run_result in mode_result["runs"]:
+            print(
+                f"{mode_result['mode']:>8} {mode_result['index_bytes'] / 2**20:>10.1f} "
+                f"{mode_result['build_seconds']:>8.1f} {run_result['rescore_factor']:>6} "
+                f"{run_result['latency_ms_p50']:>8.2f} {run_result['latency_ms_p95']:>8.2f} "
+                f"{run_result['latency_ms_p99']:>8.2f} {run_result[f'recall@{args.k}']:>7.3f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from app.services import conversation
+from app.services.conversation import PromptUnitOfWork, ConversationNotFoundError
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+class FakeSession:
+    """Stands in for AsyncSession and counts what is sent to the database."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+        return FakeResult(self.rows)
+
+    async def commit(self):
+        self.commits += 1
+
+@pytest.fixture
+def session(monkeypatch):
+    fake = FakeSession([])
+    monkeypatch.setattr(conversation, "get_async_session", lambda: fake)
+    return fake
+
+def message_row(id, role, content, summary="Earlier summary"):
+    return SimpleNamespace(
+        summary=summary, id=id, role=role, content=content,
+        created_at=datetime(2025, 8, 1, 12, id, tzinfo=timezone.utc)
+    )
+
+def test_load_new_conversation_skips_the_database(session):
+    unit_of_work = PromptUnitOfWork()
+    asyncio.run(unit_of_work.load(history_limit=10))
+
+    assert session.statements == []
+    assert session.commits == 0
+    assert unit_of_work.round_trips == 0
+
+def test_load_existing_conversation_is_one_statement(session):
+    # Newest first, as returned by the lateral join
+    session.rows = [message_row(2, "LLM", "Hi there"), message_row(1, "USER", "Hello")]
+    unit_of_work = PromptUnitOfWork("conversation-1")
+    asyncio.run(unit_of_work.load(history_limit=10))
+
+    assert len(session.statements) == 1
+    assert session.statements[0][1] == {"conversation_id": "conversation-1", "limit": 10}
+    assert session.commits == 0
+    assert unit_of_work.round_trips == 1
+    assert unit_of_work.summary == "Earlier summary"
+    assert [message["content"] for message in unit_of_work.history] == ["Hello", "Hi there"]
+
+def test_load_conversation_without_unsummarized_messages(session):
+    session.rows = [SimpleNamespace(summary="Everything so far", id=None, role=None, content=None, created_at=None)]
+    unit_of_work = PromptUnitOfWork("conversation-1")
+    asyncio.run(unit_of_work.load(history_limit=10))
+
+    assert unit_of_work.summary == "Everything so far"
+    assert unit_of_work.history == []
+
+def test_load_unknown_conversation_raises(session):
+    unit_of_work = PromptUnitOfWork("missing")
+    with pytest.raises(ConversationNotFoundError):
+        asyncio.run(unit_of_work.load(history_limit=10))
+
+@pytest.mark.parametrize("conversation_id", [None, "conversation-1"])
+def test_save_turn_is_one_statement_and_one_commit(session, conversation_id):
+    unit_of_work = PromptUnitOfWork(conversation_id)
+    asyncio.run(unit_of_work.save_turn("What is RAG?", "Retrieval augmented generation."))
+
+    assert len(session.statements) == 1
+    params = session.statements[0][1]
+    assert params["conversation_id"] == unit_of_work.conversation_id
+    assert (params["question"], params["answer"]) == ("What is RAG?", "Retrieval augmented generation.")
+    assert session.commits == 1
+    assert unit_of_work.round_trips == 2
+
+def test_full_turn_round_trips(session):
+    session.rows = [message_row(1, "USER", "Hello")]
+    unit_of_work = PromptUnitOfWork("conversation-1")
+    asyncio.run(unit_of_work.load(history_limit=10))
+    asyncio.run(unit_of_work.save_turn("Follow-up?", "Answer."))
+
+    assert len(session.statements) == 2
+    assert session.commits == 1
+    assert unit_of_work.round_trips == 3